@@ -0,0 +1,169 @@
+import os
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+'''
+Načíta anotácie parkovacích miest z jedného XML súboru {fileName} (iba id, obsadenosť a rotatedRect, contour sa preskočí)
+    - Vráti (pole anotácií typu AnnotationIndex.SPACE_DTYPE, počet parkovacích miest s chybou)
+    - Je mimo triedy, aby sa dala poslať do iného procesu
+'''
+def parseAnnotations(fileName):
+    spaces = []
+    errorCounter = 0
+    space = None
+    for event, element in ET.iterparse(fileName, events=("start", "end")):
+        if(event == "start"):
+            if(element.tag == "space"):
+                space = {"id": element.get("id"), "occupied": element.get("occupied")}
+            elif(space is not None and element.tag in ["center", "size", "angle"]):
+                space[element.tag] = element.attrib
+            continue
+
+        if(element.tag != "space"):
+            continue
+
+        # Same values as ParkingSpace.setInfo
+        try:
+            spaces.append((int(space["id"]), bool(int(space["occupied"])),
+                           (int(space["center"]["x"]), int(space["center"]["y"])),
+                           (int(space["size"]["w"]), int(space["size"]["h"])),
+                           int(space["angle"]["d"])))
+        except (KeyError, TypeError, ValueError):
+            errorCounter += 1
+
+        space = None
+        element.clear()
+
+    return (np.array(spaces, dtype=AnnotationIndex.SPACE_DTYPE), errorCounter)
+
+
+'''
+Trieda AnnotationIndex reprezentuje index anotácií (XML súborov) jedného priečinka datasetu
+    - XML súbory sa prečítajú raz a anotácie všetkých obrázkov sa uložia do dvoch .npy súborov (obrázky a parkovacie miesta)
+    - Ďalšie načítania datasetu čítajú iba tieto polia, XML sa už neparsuje
+    - Pri aktualizácii (update) sa znova prečítajú iba nové alebo zmenené XML súbory (podľa času zmeny a veľkosti)
+'''
+class AnnotationIndex:
+
+    INDEX_DIR = ".annotationIndex"
+    SPACE_DTYPE = np.dtype([("id", "i4"), ("occupied", "?"), ("center", "i4", (2,)), ("size", "i4", (2,)), ("angle", "i4")])
+    FRAME_DTYPE = np.dtype([("name", "U64"), ("mtime", "i8"), ("fileSize", "i8"), ("start", "i8"), ("count", "i4"), ("errors", "i4")])
+
+    def __init__(self, path):
+        self.path = path
+        self.directory = f"{path}/{self.INDEX_DIR}"
+        self.framesFileName = f"{self.directory}/frames.npy"
+        self.spacesFileName = f"{self.directory}/spaces.npy"
+
+        self.frames = np.empty(0, dtype=self.FRAME_DTYPE)
+        self.spaces = np.empty(0, dtype=self.SPACE_DTYPE)
+        self.rows = {}
+
+
+    '''
+    Načíta index z disku (ak neexistuje alebo je poškodený, index zostane prázdny)
+    '''
+    def load(self):
+        try:
+            frames = np.load(self.framesFileName)
+            spaces = np.load(self.spacesFileName)
+        except (OSError, ValueError):
+            return self
+
+        if(frames.dtype != self.FRAME_DTYPE or spaces.dtype != self.SPACE_DTYPE or (len(frames) and frames["start"][-1] + frames["count"][-1] != len(spaces))):
+            return self
+
+        self.setIndex(frames, spaces)
+        return self
+
+
+    '''
+    Uloží index na disk (najprv do dočasného súboru, aby pri prerušení nezostal poškodený)
+    '''
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+        for fileName, array in [(self.spacesFileName, self.spaces), (self.framesFileName, self.frames)]:
+            temporaryFileName = f"{fileName}.tmp"
+            with open(temporaryFileName, "wb") as file:
+                np.save(file, array)
+            os.replace(temporaryFileName, fileName)
+
+
+    '''
+    Nastaví polia indexu a slovník meno obrázku -> riadok
+    '''
+    def setIndex(self, frames, spaces):
+        self.frames = frames
+        self.spaces = spaces
+        self.rows = {name: row for row, name in enumerate(frames["name"].tolist())}
+
+
+    '''
+    Aktualizuje index podľa XML súborov v priečinku a uloží ho (ak sa niečo zmenilo)
+        - Znova sa prečítajú iba nové alebo zmenené XML súbory, ak je {workers} > 1 (alebo None), tak paralelne v procesoch
+        - Vráti počet prečítaných XML súborov
+    '''
+    def update(self, workers=1):
+        self.load()
+
+        # Current state of all XML files in directory
+        current = []
+        for fileNameWithExtension in sorted(os.listdir(self.path)):
+            name, extension = os.path.splitext(fileNameWithExtension)
+            if(extension == ".xml"):
+                stat = os.stat(f"{self.path}/{fileNameWithExtension}")
+                current.append((name, stat.st_mtime_ns, stat.st_size))
+
+        changed = []
+        for name, mtime, fileSize in current:
+            row = self.rows.get(name)
+            if(row is None or self.frames["mtime"][row] != mtime or self.frames["fileSize"][row] != fileSize):
+                changed.append(name)
+
+        if(not changed and len(current) == len(self.frames)):
+            return 0
+
+        fileNames = [f"{self.path}/{name}.xml" for name in changed]
+        if(workers is None or workers > 1):
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = dict(zip(changed, executor.map(parseAnnotations, fileNames, chunksize=16)))
+        else:
+            parsed = dict(zip(changed, map(parseAnnotations, fileNames)))
+
+        # Build new index, unchanged frames are copied from old index
+        frames = np.empty(len(current), dtype=self.FRAME_DTYPE)
+        spaces = []
+        start = 0
+        for index, (name, mtime, fileSize) in enumerate(current):
+            if(name in parsed):
+                frameSpaces, errors = parsed[name]
+            else:
+                frameSpaces, errors = self.get(name)
+
+            frames[index] = (name, mtime, fileSize, start, len(frameSpaces), errors)
+            spaces.append(frameSpaces)
+            start += len(frameSpaces)
+
+        self.setIndex(frames, np.concatenate(spaces) if spaces else np.empty(0, dtype=self.SPACE_DTYPE))
+        self.save()
+        return len(changed)
+
+
+    '''
+    Vráti anotácie obrázku {name} ako (pole anotácií parkovacích miest, počet parkovacích miest s chybou), alebo None, ak obrázok v indexe nie je
+    '''
+    def get(self, name):
+        row = self.rows.get(name)
+        if(row is None):
+            return None
+
+        frame = self.frames[row]
+        return (self.spaces[frame["start"]:frame["start"] + frame["count"]], int(frame["errors"]))
+
+
+    def __len__(self):
+        return len(self.frames)
@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Module resource is not available on Windows, peak RSS is then not reported
+    resource = None
+
+from Dataset import Dataset
+from Image import Image
+from KNN import KNN
+from PCA import PCA
+from SVM import SVM
+
+
+'''
+Trieda Benchmark meria jednotlivé kroky spracovania, aby sa dali porovnať medzi verziami kódu
+    - Mikro benchmarky: načítanie obrázku s XML (na obrázok), ParkingSpace.setImage a getHOGDescriptor (na parkovacie miesto)
+    - Makro benchmarky: fitovanie PCA (pre každú dimenziu), trénovanie a predikcia SVM/KNN (pre každú konfiguráciu)
+    - Čas importu modulov (cli, InferenceService, ...) v novom procese, teda čas štartu krátkych príkazov
+    - Pre každý benchmark uloží počet meraní, priepustnosť (položky/s), p50/p95 latenciu jedného merania a maximálnu RSS procesu
+    - Výsledky sa ukladajú do JSON a dajú sa porovnať s uloženými výsledkami (baseline) s povolenou odchýlkou
+'''
+class Benchmark:
+
+    def __init__(self, trainingPath, testingPath, repeat=3, warmup=1, numberOfImages=None):
+        self.trainingPath = trainingPath
+        self.testingPath = testingPath
+        self.repeat = repeat
+        self.warmup = warmup
+        self.numberOfImages = numberOfImages
+        self.results = {}
+
+
+    '''
+    Vráti maximálnu RSS procesu od jeho spustenia v MB (None, ak sa nedá zistiť)
+    '''
+    @staticmethod
+    def getPeakRSS():
+        if(resource is None):
+            return None
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+    '''
+    Uloží výsledok benchmarku {name} z nameraných časov {latencies} (sekundy) pre {items} spracovaných položiek
+    '''
+    def addResult(self, name, latencies, items):
+        latencies = np.asarray(latencies, dtype=np.float64)
+        totalTime = float(latencies.sum())
+        self.results[name] = {
+            "count": len(latencies),
+            "items": int(items),
+            "totalSeconds": round(totalTime, 6),
+            "throughput": round(items / totalTime, 2) if totalTime > 0 else None,
+            "p50Ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+            "p95Ms": round(float(np.percentile(latencies, 95)) * 1000, 4),
+            "peakRssMb": self.getPeakRSS()
+        }
+        print("{:<32} {:>12.1f}/s   p50 {:>10.3f} ms   p95 {:>10.3f} ms".format(
+            name, self.results[name]["throughput"] or 0, self.results[name]["p50Ms"], self.results[name]["p95Ms"]))
+
+
+    '''
+    Zmeria funkciu {function} {repeat}-krát (po {warmup} nemeraných spusteniach), každé spustenie spracuje {items} položiek
+    '''
+    def measure(self, name, function, items=1):
+        for _ in range(self.warmup):
+            function()
+
+        latencies = []
+        for _ in range(self.repeat):
+            startTime = time.perf_counter()
+            function()
+            latencies.append(time.perf_counter() - startTime)
+
+        self.addResult(name, latencies, items * self.repeat)
+
+
+    '''
+    Mikro benchmarky: načítanie obrázku, výsek a HOG deskriptor jedného parkovacieho miesta
+    '''
+    def runMicro(self):
+        fileNames = Dataset.getFileNames(self.trainingPath)[:self.numberOfImages]
+
+        # XML parse + Image load (including crops of all parking spaces), one measurement per frame
+        latencies = []
+        images = []
+        for fileName in fileNames:
+            startTime = time.perf_counter()
+            image = Image(self.trainingPath, fileName)
+            latencies.append(time.perf_counter() - startTime)
+            images.append(image)
+        self.addResult("micro.imageLoad", latencies, len(latencies))
+
+        # ParkingSpace.setImage and getHOGDescriptor, one measurement per parking space
+        setImageLatencies = []
+        HOGLatencies = []
+        for image in images:
+            frame = image.getImage()
+            for parkingSpace in image.getParkingSpaces():
+                startTime = time.perf_counter()
+                parkingSpace.setImage(frame)
+                setImageLatencies.append(time.perf_counter() - startTime)
+
+                parkingSpace.setHOGDescriptor(None)
+                startTime = time.perf_counter()
+                parkingSpace.getHOGDescriptor()
+                HOGLatencies.append(time.perf_counter() - startTime)
+
+        self.addResult("micro.setImage", setImageLatencies, len(setImageLatencies))
+        self.addResult("micro.getHOGDescriptor", HOGLatencies, len(HOGLatencies))
+
+
+    '''
+    Makro benchmarky: fitovanie PCA pre každú dimenziu a trénovanie/predikcia pre každú konfiguráciu klasifikátora
+    '''
+    def runMacro(self, kernels=["linear", "rbf"], neighbors=[1, 5], pcaDimensions=[16, 64, 256]):
+        trainingDataset = Dataset(self.trainingPath, featureCache=True)
+        testingDataset = Dataset(self.testingPath, featureCache=True)
+        trainingData, trainingLabels = trainingDataset.getTrainingData()
+        testingData, _ = testingDataset.getTrainingData()
+        trainingData = np.ascontiguousarray(trainingData, dtype=np.float32)
+        testingData = np.ascontiguousarray(testingData, dtype=np.float32)
+
+        for pcaDimension in pcaDimensions:
+            self.measure(f"macro.pcaFit[{pcaDimension}]", lambda: PCA(pcaDimension).fit(trainingData), len(trainingData))
+
+        configurations = [(f"SVM {kernel}", lambda kernel=kernel: SVM(kernel)) for kernel in kernels]
+        configurations += [(f"KNN {kNeighbors}", lambda kNeighbors=kNeighbors: KNN(kNeighbors)) for kNeighbors in neighbors]
+        for name, createClassifier in configurations:
+            classifier = createClassifier()
+            self.measure(f"macro.train[{name}]", lambda: classifier.fit(trainingData, trainingLabels), len(trainingData))
+            self.measure(f"macro.predict[{name}]", lambda: classifier.makePrediction(testingData), len(testingData))
+
+
+    '''
+    Čas importu modulov {modules}, každé meranie je v novom procese Pythonu (moduly ešte nie sú načítané)
+    '''
+    def runImports(self, modules=["cli", "InferenceService", "Dataset", "SVM"]):
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for module in modules:
+            code = f"import time; startTime = time.perf_counter(); import {module}; print(time.perf_counter() - startTime)"
+            latencies = []
+            for _ in range(self.repeat):
+                output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True, check=True).stdout
+                latencies.append(float(output.split()[-1]))
+
+            self.addResult(f"import.{module}", latencies, len(latencies))
+
+
+    '''
+    Spustí všetky benchmarky a vráti výsledky spolu s informáciami o prostredí
+    '''
+    def run(self, micro=True, macro=True, imports=True):
+        if(imports):
+            self.runImports()
+        if(micro):
+            self.runMicro()
+        if(macro):
+            self.runMacro()
+
+        return {
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpuCount": os.cpu_count()
+            },
+            "settings": {"training": self.trainingPath, "testing": self.testingPath, "repeat": self.repeat,
+                         "warmup": self.warmup, "numberOfImages": self.numberOfImages},
+            "benchmarks": self.results
+        }
+
+
+    '''
+    Porovná výsledky {results} s uloženými výsledkami {baseline}, vráti zoznam regresií (text)
+        - Regresia je, ak p50 latencia stúpla alebo priepustnosť klesla o viac ako {threshold} (0.1 = 10 %)
+    '''
+    @staticmethod
+    def compare(results, baseline, threshold=0.1):
+        regressions = []
+        for name, result in results["benchmarks"].items():
+            if(name not in baseline["benchmarks"]):
+                continue
+
+            base = baseline["benchmarks"][name]
+            if(result["p50Ms"] > base["p50Ms"] * (1 + threshold)):
+                regressions.append(f"{name}: p50 {base['p50Ms']} ms -> {result['p50Ms']} ms")
+            if(result["throughput"] and base["throughput"] and result["throughput"] < base["throughput"] * (1 - threshold)):
+                regressions.append(f"{name}: priepustnost {base['throughput']}/s -> {result['throughput']}/s")
+
+        return regressions
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark krokov spracovania (načítanie, príznaky, trénovanie, predikcia)")
+    parser.add_argument("--training", default="datasets/training")
+    parser.add_argument("--testing", default="datasets/validating")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--images", type=int, help="počet obrázkov pre mikro benchmarky (predvolene všetky)")
+    parser.add_argument("--only", choices=["micro", "macro", "imports"], help="spustiť iba mikro, makro benchmarky alebo čas importu")
+    parser.add_argument("--output", default="benchmark.json", help="JSON súbor s výsledkami")
+    parser.add_argument("--baseline", help="JSON súbor s výsledkami, s ktorými sa porovná")
+    parser.add_argument("--threshold", type=float, default=0.1, help="povolené zhoršenie oproti baseline (0.1 = 10 %%)")
+    arguments = parser.parse_args()
+
+    benchmark = Benchmark(arguments.training, arguments.testing, arguments.repeat, arguments.warmup, arguments.images)
+    results = benchmark.run(arguments.only in [None, "micro"], arguments.only in [None, "macro"], arguments.only in [None, "imports"])
+    with open(arguments.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if(arguments.baseline):
+        with open(arguments.baseline) as file:
+            regressions = Benchmark.compare(results, json.load(file), arguments.threshold)
+
+        for regression in regressions:
+            print(f"REGRESIA - {regression}")
+        if(regressions):
+            sys.exit(1)
+        print("Bez regresii")
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+'''
+Trieda ChangeDetector rozhoduje, ktoré parkovacie miesta sa medzi obrázkami z kamery zmenili a treba ich znova klasifikovať
+    - Pre každé miesto (podľa id) si pamätá zmenšený výsek z obrázku, na ktorom bolo naposledy klasifikované, a poslednú predikciu
+    - Miesto sa znova klasifikuje, ak priemerný absolútny rozdiel zmenšených výsekov prekročí {threshold} (v odtieňoch šedej 0-255)
+    - Porovnáva sa s výsekom z poslednej klasifikácie (nie z predchádzajúceho obrázku), takže ani pomalá zmena sa nestratí
+    - Po {maxAge} obrázkoch bez klasifikácie sa miesto klasifikuje znova aj bez zmeny (None = nikdy)
+'''
+class ChangeDetector:
+
+    # Crops are downsampled by this factor in both directions before comparison (128 x 64 -> 16 x 8)
+    DOWNSAMPLE = 8
+
+    def __init__(self, threshold=8.0, maxAge=None):
+        self.threshold = threshold
+        self.maxAge = maxAge
+        self.reset()
+
+
+    '''
+    Zabudne všetky uložené výseky a predikcie (ďalší obrázok sa klasifikuje celý)
+    '''
+    def reset(self):
+        self.ids = None
+        self.references = None
+        self.predictions = None
+        self.ages = None
+
+        # Statistics over all frames
+        self.numberOfSpaces = 0
+        self.numberOfSkipped = 0
+
+
+    '''
+    Vráti zmenšené výseky {crops} (N x H x W, uint8) ako float32
+    '''
+    def downsample(self, crops):
+        numberOfCrops, height, width = crops.shape
+        factor = self.DOWNSAMPLE
+        blocks = crops[:, :height - height % factor, :width - width % factor].reshape(numberOfCrops, height // factor, factor, width // factor, factor)
+        return blocks.mean(axis=(2, 4), dtype=np.float32)
+
+
+    '''
+    Vráti masku parkovacích miest {ids} s výsekmi {crops}, ktoré treba znova klasifikovať
+        - Ak sa zmenili id parkovacích miest (iné rozloženie), treba klasifikovať všetky
+    '''
+    def getChangedSpaces(self, ids, crops):
+        self.current = self.downsample(crops)
+        if(self.ids is None or not np.array_equal(self.ids, ids)):
+            self.ids = np.array(ids, copy=True)
+            self.references = self.current.copy()
+            self.predictions = np.zeros(len(ids), dtype=np.int8)
+            self.ages = np.zeros(len(ids), dtype=np.int64)
+            return np.ones(len(ids), dtype=bool)
+
+        differences = np.abs(self.current - self.references).mean(axis=(1, 2))
+        changed = differences > self.threshold
+        if(self.maxAge is not None):
+            changed |= self.ages >= self.maxAge
+
+        return changed
+
+
+    '''
+    Uloží nové predikcie {predictions} pre zmenené miesta {changed} (maska z getChangedSpaces) a vráti predikcie všetkých miest
+    '''
+    def update(self, changed, predictions):
+        self.references[changed] = self.current[changed]
+        self.predictions[changed] = predictions
+        self.ages[changed] = 0
+        self.ages[~changed] += 1
+
+        self.numberOfSpaces += len(changed)
+        self.numberOfSkipped += int(len(changed) - np.count_nonzero(changed))
+
+        return self.predictions.copy()
+
+
+    '''
+    Vráti podiel parkovacích miest, ktorých klasifikácia sa preskočila, zo všetkých spracovaných
+    '''
+    def getSkipRate(self):
+        if(self.numberOfSpaces == 0):
+            return 0.0
+
+        return self.numberOfSkipped / self.numberOfSpaces
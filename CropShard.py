@@ -0,0 +1,158 @@
+import json
+import os
+
+import numpy as np
+
+from Layout import Layout
+from ParkingSpace import ParkingSpace
+from ParkingSpaceTable import ParkingSpaceTable
+
+
+'''
+Trieda CropShard reprezentuje zbalený dataset: iba výseky parkovacích miest (64x128, uint8) a ich údaje, bez JPG a XML súborov
+    - Shard je priečinok s tromi súbormi:
+        - crops.u8: výseky všetkých parkovacích miest za sebou (N x 128 x 64, uint8)
+        - spaces.bin: údaje o parkovacích miestach (pole typu SPACE_DTYPE: obrázok, id, rotatedRect, obsadenosť)
+        - manifest.json: formát, konfigurácia výsekov, počet parkovacích miest a mená obrázkov (aj priečinok, z ktorého pochádzajú)
+    - Výseky a údaje sa otvárajú cez numpy.memmap, takže načítanie je takmer okamžité a procesy zdieľajú tie isté stránky pamäte
+    - Nové obrázky sa pridávajú na koniec súborov (append), platný počet záznamov určuje iba manifest (prepíše sa ako posledný)
+'''
+class CropShard:
+
+    FORMAT = "bakalarska_praca.cropShard"
+    VERSION = 1
+    SPACE_DTYPE = np.dtype([("image", "i4"), ("id", "i4"), ("center", "i4", (2,)), ("size", "i4", (2,)),
+                            ("angle", "i4"), ("occupied", "?")])
+
+    def __init__(self, path):
+        self.path = path
+        self.manifestFileName = f"{path}/manifest.json"
+        self.cropsFileName = f"{path}/crops.u8"
+        self.spacesFileName = f"{path}/spaces.bin"
+
+        self.manifest = None
+        self.crops = None
+        self.spaces = None
+
+
+    '''
+    Vráti true/false podľa toho, či shard už existuje
+    '''
+    def exists(self):
+        return os.path.exists(self.manifestFileName)
+
+
+    '''
+    Vráti konfiguráciu výsekov (shard sa dá použiť iba s rovnakou konfiguráciou)
+    '''
+    @staticmethod
+    def getCropConfiguration(reduction=1):
+        width, height = ParkingSpace.RESIZE_SIZE
+        return {"cropShape": [height, width], "crop": Layout.CROP_METHOD, "reduction": reduction}
+
+
+    '''
+    Otvorí shard: načíta manifest a namapuje výseky a údaje o parkovacích miestach do pamäte
+    '''
+    def open(self):
+        if(not self.exists()):
+            raise Exception(f"CropShard - {self.path} nie je shard")
+
+        with open(self.manifestFileName) as file:
+            manifest = json.load(file)
+
+        if(manifest.get("format") != self.FORMAT):
+            raise Exception(f"CropShard - {self.path} nie je shard")
+        if(manifest["version"] != self.VERSION):
+            raise Exception(f"CropShard - Nepodporovaná verzia {manifest['version']} (podporovaná je {self.VERSION})")
+        if(manifest["configuration"] != self.getCropConfiguration(manifest["configuration"]["reduction"])):
+            raise Exception(f"CropShard - Shard bol vytvorený s inou konfiguráciou výsekov: {manifest['configuration']}")
+
+        self.manifest = manifest
+        numberOfSpaces = manifest["numberOfSpaces"]
+        height, width = manifest["configuration"]["cropShape"]
+        if(numberOfSpaces == 0):
+            self.crops = np.empty((0, height, width), dtype=np.uint8)
+            self.spaces = np.empty(0, dtype=self.SPACE_DTYPE)
+        else:
+            self.crops = np.memmap(self.cropsFileName, dtype=np.uint8, mode="r", shape=(numberOfSpaces, height, width))
+            self.spaces = np.memmap(self.spacesFileName, dtype=self.SPACE_DTYPE, mode="r", shape=(numberOfSpaces,))
+
+        return self
+
+
+    '''
+    Pridá do shardu všetky obrázky z datasetu {dataset} (Dataset, stačí lazy=True), ktoré v ňom ešte nie sú (podľa mena)
+        - Ak shard neexistuje, vytvorí ho, vráti počet pridaných obrázkov
+    '''
+    def append(self, dataset):
+        configuration = self.getCropConfiguration(dataset.frameDecoder.reduction)
+        if(self.exists()):
+            self.open()
+            if(self.manifest["configuration"] != configuration):
+                raise Exception(f"CropShard.append - Dataset má inú konfiguráciu výsekov ako shard: {configuration}")
+            manifest = self.manifest
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            manifest = {"format": self.FORMAT, "version": self.VERSION, "configuration": configuration,
+                        "numberOfSpaces": 0, "images": [], "sources": []}
+
+        # Release memory maps before files are changed
+        self.crops = None
+        self.spaces = None
+
+        # Data after last valid record (e.g. from interrupted append) are removed
+        numberOfSpaces = manifest["numberOfSpaces"]
+        for fileName, recordSize in [(self.cropsFileName, int(np.prod(configuration["cropShape"]))), (self.spacesFileName, self.SPACE_DTYPE.itemsize)]:
+            with open(fileName, "ab") as file:
+                file.truncate(numberOfSpaces * recordSize)
+
+        imageNames = set(manifest["images"])
+        source = os.path.abspath(dataset.path)
+        numberOfImages = 0
+        with open(self.cropsFileName, "ab") as cropsFile, open(self.spacesFileName, "ab") as spacesFile:
+            for image in dataset.iterImages():
+                if(image.getImageName() in imageNames or not image.getParkingSpaces()):
+                    continue
+
+                parkingSpaces = image.getParkingSpaces()
+                spaces = np.empty(len(parkingSpaces), dtype=self.SPACE_DTYPE)
+                for index, parkingSpace in enumerate(parkingSpaces):
+                    spaces[index] = (len(manifest["images"]), parkingSpace.id, parkingSpace.center, parkingSpace.size,
+                                     parkingSpace.angle, parkingSpace.isOccupied())
+
+                cropsFile.write(np.ascontiguousarray([parkingSpace.image for parkingSpace in parkingSpaces], dtype=np.uint8).tobytes())
+                spacesFile.write(spaces.tobytes())
+
+                manifest["images"].append(image.getImageName())
+                manifest["sources"].append(source)
+                manifest["numberOfSpaces"] += len(parkingSpaces)
+                imageNames.add(image.getImageName())
+                numberOfImages += 1
+
+        # Manifest is written last, so records are valid only when their data are complete
+        temporaryFileName = f"{self.manifestFileName}.tmp"
+        with open(temporaryFileName, "w") as file:
+            json.dump(manifest, file)
+        os.replace(temporaryFileName, self.manifestFileName)
+
+        self.open()
+        return numberOfImages
+
+
+    def __len__(self):
+        return 0 if self.spaces is None else len(self.spaces)
+
+
+    '''
+    Vráti tabuľku parkovacích miest nad namapovanými výsekmi (výseky sa nekopírujú)
+    '''
+    def getParkingSpaceTable(self, HOGExtractor=None):
+        return ParkingSpaceTable.fromArrays(self.spaces, self.crops, self.manifest["images"], HOGExtractor)
+
+
+    '''
+    Vráti priečinok, z ktorého pochádza obrázok s indexom {imageIndex} (napr. pre vykreslenie pôvodného obrázku)
+    '''
+    def getSource(self, imageIndex):
+        return self.manifest["sources"][imageIndex]
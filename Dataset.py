@@ -1,49 +1,200 @@
-from cProfile import label
 import os
 
 import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from AnnotationIndex import AnnotationIndex
+from CropShard import CropShard
+from Evaluation import Evaluation
+from FeatureCache import FeatureCache
+from FrameDecoder import FrameDecoder
+from HOGExtractor import HOGExtractor
 from Image import Image
+from Layout import Layout
+from ParkingSpace import ParkingSpace
+from ParkingSpaceTable import ParkingSpaceTable
+from Profiler import Profiler
+
+
+'''
+Načíta jeden obrázok (pri chybe vráti None)
+    - Je mimo triedy, aby sa dala poslať do iného procesu
+'''
+def loadImage(path, fileName, keepImage=True, annotations=None, frame=None, frameDecoder=None):
+    try:
+        return Image(path, fileName, keepImage, annotations, frame, frameDecoder)
+    except:
+        return None
+
 
 '''
 Trieda Dataset reprezentuje množinu obrázkov
 '''
 class Dataset:
 
-    def __init__(self, path):
+    # Type of space_refs returned by iterBatches (image name and parking space id)
+    SPACE_REF_DTYPE = np.dtype([("image", "U64"), ("id", "i4")])
+
+    def __init__(self, path, workers=1, featureCache=False, keepImages=True, HOGBackend="numpy", lazy=False, annotationIndex=False, reduction=1):
+        self.path = path
         self.pca = None
+        self.workers = workers
+        self.keepImages = keepImages
+
+        # Backend for computing HOG descriptors of whole dataset (see HOGExtractor)
+        self.HOGExtractor = HOGExtractor(ParkingSpace.HOG_PARAMETERS, HOGBackend)
+
+        # Index of XML annotations in {path} directory, only new or modified XML files are parsed (see AnnotationIndex)
+        self.annotationIndex = None
+        if(annotationIndex):
+            self.annotationIndex = AnnotationIndex(path)
+            self.annotationIndex.update(workers)
+
+        # Frames are decoded as grayscale, {reduction} times smaller ("auto" = the biggest reduction without loss of detail, see FrameDecoder)
+        self.fileNames = self.getFileNames(path)
+        if(reduction == "auto"):
+            reduction = FrameDecoder.getMaxReduction(self.getParkingSpaceSizes())
+        self.frameDecoder = FrameDecoder(reduction)
+
+        # Persistent cache of HOG descriptors in {path} directory (see FeatureCache)
+        self.featureCache = None
+        if(featureCache):
+            self.featureCache = FeatureCache(path, {**ParkingSpace.getFeatureParameters(), "crop": Layout.CROP_METHOD, "reduction": reduction})
+
+        # Packed dataset with crops mapped from disk (see fromShard)
+        self.shard = None
 
         # For storing data, help with time when one dataset is used for multiple times
-        self.parkingSpaces = None
+        self.parkingSpaceTable = None
         self.data = None
-        self.dataWithPCA = None
+        self.numberOfComponents = None
+        self.projectedData = None
+        self.dataWithPCA = {}
         
         # Load all images from {path} directory
-        self.loadImages(path)
+        # With keepImages=False only parking space images stay in memory, parking lot images are loaded again when needed
+        # With lazy=True images are loaded only when they are needed (iterBatches never loads all of them at once)
+        self.images = None
+        if(not lazy):
+            self.loadImages(path, workers, keepImages)
 
 
     '''
     Načíta všetky obrázky z {path} priečinka
+        - Ak je {workers} > 1, obrázky sa načítavajú paralelne v {workers} procesoch
+        - Poradie obrázkov je vždy rovnaké (zoradené podľa mena), aby indexy v setPredictions sedeli
     '''
-    def loadImages(self, path):
+    @Profiler.profile()
+    def loadImages(self, path, workers=1, keepImages=True):
         self.images = []
+        fileNames = self.getFileNames(path)
+
+        if(workers is None or workers > 1):
+            # Executor.map keeps the order of input, so result is deterministic
+            # Images come back without full parking lot frame (see Image.__getstate__)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                images = executor.map(loadImage, repeat(path), fileNames, repeat(keepImages), map(self.getAnnotations, fileNames),
+                                      repeat(None), repeat(self.frameDecoder), chunksize=4)
+                self.images = [image for image in images if image is not None]
+        else:
+            # Next frames are decoded in background threads, while current image is processed
+            for fileName, frame in self.prefetchFrames(path, fileNames):
+                image = loadImage(path, fileName, keepImages, self.getAnnotations(fileName), frame, self.frameDecoder)
+                if(image is not None):
+                    self.images.append(image)
+
+
+    '''
+    Otvorí zbalený dataset (CropShard) z priečinka {shardPath}, výseky sa iba namapujú do pamäte (žiadne JPG ani XML sa nenačítavajú)
+    '''
+    @classmethod
+    def fromShard(cls, shardPath, HOGBackend="numpy"):
+        dataset = cls(shardPath, HOGBackend=HOGBackend, lazy=True)
+        dataset.shard = CropShard(shardPath).open()
+        # Crops in shard were cut from frames decoded with reduction from manifest
+        dataset.frameDecoder = FrameDecoder(dataset.shard.manifest["configuration"]["reduction"])
+        return dataset
+
+
+    '''
+    Postupne vracia obrázky datasetu (načítané po jednom, bez obrázku parkoviska v pamäti), ďalšie sa medzitým načítavajú vo vláknach
+    '''
+    def iterImages(self):
+        if(self.images is not None):
+            yield from self.images
+            return
 
+        for fileName, frame in self.prefetchFrames(self.path, self.fileNames):
+            image = loadImage(self.path, fileName, False, self.getAnnotations(fileName), frame, self.frameDecoder)
+            if(image is not None):
+                yield image
+
+
+    '''
+    Vráti mená (bez prípony) všetkých JPG obrázkov v {path} priečinku zoradené podľa mena
+    '''
+    @staticmethod
+    def getFileNames(path):
         # Get all files in directory
         # And get only JPG images, because every image in PUCPR is in .jpg format
-        allFilesInDirectory = os.listdir(path)
+        fileNames = []
+        allFilesInDirectory = sorted(os.listdir(path))
         for fileNameWithExtension in allFilesInDirectory:
             fileName, extension = os.path.splitext(fileNameWithExtension)
             if(extension == ".jpg"):
-                try:    
-                    self.images.append(Image(path, fileName))
-                except:
-                    continue
+                fileNames.append(fileName)
+
+        return fileNames
+
+
+    '''
+    Postupne vracia (meno obrázku, obrázok v odtieňoch šedej) pre obrázky {fileNames} z {path} priečinka, ďalšie sa načítavajú vo vláknach
+    '''
+    def prefetchFrames(self, path, fileNames):
+        frames = self.frameDecoder.prefetch([f"{path}/{fileName}.jpg" for fileName in fileNames])
+        for fileName, (_, frame) in zip(fileNames, frames):
+            yield (fileName, frame)
+
+
+    '''
+    Vráti veľkosti (šírka, výška) parkovacích miest datasetu (z AnnotationIndex, inak z XML prvého obrázku), podľa nich sa vyberá zmenšenie obrázkov
+    '''
+    def getParkingSpaceSizes(self):
+        if(self.annotationIndex is not None):
+            return self.annotationIndex.spaces["size"]
+        if(not self.fileNames):
+            return []
+
+        layout = Layout.fromXML(f"{self.path}/{self.fileNames[0]}.xml")
+        return [size for _, size, _ in layout.rectangles]
+
+
+    '''
+    Vráti anotácie obrázku {fileName} z AnnotationIndex (None, ak index nie je zapnutý, vtedy sa číta XML)
+    '''
+    def getAnnotations(self, fileName):
+        if(self.annotationIndex is None):
+            return None
+
+        return self.annotationIndex.get(fileName)
+
+
+    '''
+    Vráti všetky obrázky v datasete (pri lazy=True ich pri prvom volaní načíta)
+    '''
+    def getImages(self):
+        if(self.images is None):
+            self.loadImages(self.path, self.workers, self.keepImages)
+
+        return self.images
 
 
     '''
     Ukáže všetky obrázky v datasete
     '''
     def showImages(self):
-        for image in self.images:
+        for image in self.getImages():
             image.drawParkingSpacesOnImageBasedOnPrediction()
             image.showImage()
             cv2.waitKey(0)
@@ -53,27 +204,27 @@ class Dataset:
     Vráti všetky parkovacie miesta v datasete
     '''
     def getParkingSpaces(self):
-        if(self.parkingSpaces is None):
-            self.parkingSpaces = []
-            for image in self.images:
-                self.parkingSpaces.extend(image.getParkingSpaces())
-        
-        return self.parkingSpaces
+        return self.getParkingSpaceTable().getParkingSpaces()
+
+
+    '''
+    Vráti všetky parkovacie miesta v datasete v stĺpcovej podobe (ParkingSpaceTable)
+    '''
+    def getParkingSpaceTable(self):
+        if(self.parkingSpaceTable is None and self.shard is not None):
+            self.parkingSpaceTable = self.shard.getParkingSpaceTable(self.HOGExtractor)
+        if(self.parkingSpaceTable is None):
+            self.parkingSpaceTable = ParkingSpaceTable(self.getImages(), self.HOGExtractor)
+
+        return self.parkingSpaceTable
 
 
     '''
     Spočíta a na konci vypíše štatistiku o datasete
     '''
     def getStatistics(self):
-        totalCounter = 0
-        occupiedCounter = 0
-        unoccupiedCounter = 0
-        for image in self.images:
-            total, occupied, unoccupied = image.getStatistics()
-            totalCounter += total
-            occupiedCounter += occupied
-            unoccupiedCounter += unoccupied
-        
+        totalCounter, occupiedCounter, unoccupiedCounter = self.getParkingSpaceTable().getStatistics()
+
         print(f"Celkovo má dataset parkovacích miest: {totalCounter}")
         print(f"    - Z toho obsadených: {occupiedCounter}")
         print(f"    - Z toho neobsadených: {unoccupiedCounter}")
@@ -83,40 +234,57 @@ class Dataset:
     Vráti najhoršie hodnotený obrázok v datasete
     '''
     def getWorstImage(self):
-        worstImage = None
-        worstImageWrongPredictionsCounter = -1
-        for image in self.images:
-            actualImageWrongPredictionsCounter = image.howManyWrongPredictions()
-            if(worstImageWrongPredictionsCounter == -1 or worstImageWrongPredictionsCounter < actualImageWrongPredictionsCounter):
-                worstImageWrongPredictionsCounter = actualImageWrongPredictionsCounter
-                worstImage = image
-        
-        return worstImage
+        # Shard has only crops, worst image is loaded from directory, where it was originally
+        if(self.shard is not None):
+            wrongPredictionsPerImage = self.getParkingSpaceTable().getWrongPredictionsPerImage()
+            if(len(wrongPredictionsPerImage) == 0):
+                return None
+
+            imageIndex = int(np.argmax(wrongPredictionsPerImage))
+            image = loadImage(self.shard.getSource(imageIndex), self.parkingSpaceTable.imageNames[imageIndex], False)
+            if(image is not None):
+                # Parking spaces of shard table have predictions
+                parkingSpaces = self.getParkingSpaces()
+                image.parkingSpaces = [parkingSpaces[row] for row in np.flatnonzero(self.parkingSpaceTable.spaces["image"] == imageIndex)]
+            return image
+
+        if(not self.getImages()):
+            return None
+
+        wrongPredictionsPerImage = self.getParkingSpaceTable().getWrongPredictionsPerImage()
+        return self.images[int(np.argmax(wrongPredictionsPerImage))]
+
+
+    '''
+    Vráti vyhodnotenie klasifikácie datasetu (Evaluation) s predikciami {predictions}, alebo s tými, ktoré sú nastavené (setPredictions)
+    '''
+    def getEvaluation(self, predictions=None):
+        return Evaluation.fromDataset(self, predictions)
 
 
     '''
     Uloží najhoršie hodnotený obrázok v datasete do {dir} priečinku a vo formáte {format}
+        - Súbory sa zapisujú na pozadí (Image.getRenderer, Image.waitForRenderer počká na zápis), {contactSheet} = True uloží chybné parkovacie miesta do jedného obrázku
     '''
-    def saveWorstImage(self, how="EMPTY", dir="", format="png"):
+    def saveWorstImage(self, how="EMPTY", dir="", format="png", contactSheet=False):
         worstImage = self.getWorstImage()
-        worstImage.saveImageAsWorst(how, dir, format)
+        worstImage.saveImageAsWorst(how, dir, format, contactSheet)
 
 
     '''
-    Vráti dáta v podobe (<vektor>, <obsadenosť>)
+    Vráti dáta v podobe (<matica HOG deskriptorov float32>, <pole obsadenosti int8>)
     Ak je nastavený PCA, najprv tieto dáta preženie cez PCA a až potom ich vráti
+    Ak je zapnutá FeatureCache, HOG deskriptory sa načítajú z nej a vypočítajú sa iba chýbajúce
     '''
+    @Profiler.profile()
     def getTrainingData(self):
         def getTrainingData():
-            # Get training data
-            trainingData = []       # HOGDescriptor
-            labels = []             # Occupancy
+            parkingSpaceTable = self.getParkingSpaceTable()
+            if(self.featureCache is not None):
+                self.featureCache.fill(parkingSpaceTable)
 
-            for parkingSpace in self.getParkingSpaces():
-                trainingData.append(parkingSpace.getHOGDescriptor())
-                labels.append(int(parkingSpace.isOccupied()))
-
-            return (trainingData, labels)
+            # Get training data (HOGDescriptor matrix, occupancy)
+            return (parkingSpaceTable.getDescriptors(), parkingSpaceTable.getLabels())
 
 
         # PCA is not set
@@ -127,32 +295,140 @@ class Dataset:
             return self.data
 
         # PCA is set
-        if(self.dataWithPCA is None):
+        # Data are projected only once with all components of PCA, every dimension is then only view to first columns
+        numberOfComponents = self.numberOfComponents
+        if(numberOfComponents is None):
+            numberOfComponents = self.pca.numberOfComponents
+
+        if(numberOfComponents not in self.dataWithPCA):
             if(self.data is None):
                 self.data = getTrainingData()
             trainingData, labels = self.data
-            trainingData = self.pca.fitAndTransform(trainingData)
-            self.dataWithPCA = (trainingData, labels)
 
-        return self.dataWithPCA
+            # PCA which was not fitted yet (e.g. on training dataset) is fitted on this dataset
+            if(not self.pca.isFitted()):
+                self.pca.fit(trainingData)
+            if(self.projectedData is None):
+                self.projectedData = self.pca.transform(trainingData)
+
+            self.dataWithPCA[numberOfComponents] = (self.projectedData[:, :numberOfComponents], labels)
+
+        return self.dataWithPCA[numberOfComponents]
 
 
     '''
-    Nastav PCA, ktoré sa bude používať na redukciu dimenzie dát
-    Pri nastavení nastav aj dataWithPCA = None, keďže sa pri behu môže zmeniť na iné PCA a potom by vracalo zlé výsledky (pre skorej nastavené)
+    Nastav PCA, ktoré sa bude používať na redukciu dimenzie dát, a počet jeho komponentov, ktoré sa použijú (None = všetky)
+        - Ak PCA ešte nie je nafitované, nafituje sa na dátach tohto datasetu, inak sa dáta iba transformujú
+        - Pri zmene PCA sa zahodia uložené dáta pre predchádzajúce PCA, pri zmene počtu komponentov sa použijú uložené
     '''
-    def setPCA(self, PCA):
+    def setPCA(self, PCA, numberOfComponents=None):
+        if(PCA is not self.pca):
+            self.projectedData = None
+            self.dataWithPCA = {}
+
         self.pca = PCA
-        self.dataWithPCA = None
+        self.numberOfComponents = numberOfComponents
 
 
     '''
     Parkovacím miestam nastaví triedu, do ktorej ich klasifikoval klasifikátor
     '''
     def setPredictions(self, predictions):
-        for index, parkingSpace in enumerate(self.getParkingSpaces()):
-            parkingSpace.setPredictOccupied(predictions[index])
+        self.getParkingSpaceTable().setPredictions(predictions)
         
 
 
+    '''
+    Postupne vracia dáta datasetu po blokoch (<matica deskriptorov float32>, <pole obsadenosti int8>, <space_refs>)
+        - Každý blok má {batchSize} riadkov (posledný môže mať menej), space_refs je pole (meno obrázku, id parkovacieho miesta) typu SPACE_REF_DTYPE
+        - Ak sú obrázky už načítané, bloky sú iba časti matice z getTrainingData
+        - Inak (lazy=True) sa obrázky načítavajú po jednom, v pamäti je vždy najviac jeden obrázok a jeden blok dát
+        - Ak je zapnutá FeatureCache, deskriptory sa z nej iba čítajú, chýbajúce sa vypočítajú, ale do cache sa neukladajú
+        - Ak je nastavený PCA, bloky sú už transformované (PCA musí byť nafitované, po blokoch sa fitovať nedá)
+    '''
+    def iterBatches(self, batchSize=4096):
+        if(self.shard is not None):
+            yield from self.iterShardBatches(batchSize)
+            return
+
+        if(self.images is not None):
+            trainingData, labels = self.getTrainingData()
+            parkingSpaceTable = self.getParkingSpaceTable()
+            spaceRefs = np.empty(len(parkingSpaceTable), dtype=self.SPACE_REF_DTYPE)
+            spaceRefs["image"] = np.array(parkingSpaceTable.imageNames, dtype=self.SPACE_REF_DTYPE["image"])[parkingSpaceTable.spaces["image"]]
+            spaceRefs["id"] = parkingSpaceTable.spaces["id"]
+
+            for start in range(0, len(labels), batchSize):
+                end = start + batchSize
+                yield (np.ascontiguousarray(trainingData[start:end], dtype=np.float32), labels[start:end], spaceRefs[start:end])
+            return
+
+        if(self.pca is not None and not self.pca.isFitted()):
+            raise Exception("Dataset.iterBatches - PCA musí byť pred spracovaním po blokoch nafitované")
+
+        # Parts of current batch (one part = parking spaces of one image)
+        parts = []
+        numberOfRows = 0
+        for image in self.iterImages():
+            if(not image.getParkingSpaces()):
+                continue
+
+            parkingSpaceTable = ParkingSpaceTable([image], self.HOGExtractor)
+            if(self.featureCache is not None):
+                self.featureCache.fillFromCache(parkingSpaceTable)
+
+            descriptors = parkingSpaceTable.getDescriptors()
+            if(self.pca is not None):
+                descriptors = self.pca.transform(descriptors, self.numberOfComponents)
+
+            spaceRefs = np.empty(len(parkingSpaceTable), dtype=self.SPACE_REF_DTYPE)
+            spaceRefs["image"] = image.getImageName()
+            spaceRefs["id"] = parkingSpaceTable.spaces["id"]
+
+            parts.append((descriptors, parkingSpaceTable.getLabels(), spaceRefs))
+            numberOfRows += len(parkingSpaceTable)
+            while(numberOfRows >= batchSize):
+                batch, parts = self.splitBatch(parts, batchSize)
+                numberOfRows -= batchSize
+                yield batch
+
+        if(numberOfRows):
+            batch, _ = self.splitBatch(parts, numberOfRows)
+            yield batch
+
+
+    '''
+    Bloky dát zo shardu (pozri iterBatches), HOG deskriptory sa počítajú po blokoch z namapovaných výsekov
+    '''
+    def iterShardBatches(self, batchSize):
+        if(self.pca is not None and not self.pca.isFitted()):
+            raise Exception("Dataset.iterBatches - PCA musí byť pred spracovaním po blokoch nafitované")
+
+        parkingSpaceTable = self.getParkingSpaceTable()
+        labels = parkingSpaceTable.getLabels()
+        imageNames = np.array(parkingSpaceTable.imageNames, dtype=self.SPACE_REF_DTYPE["image"])
+        for start in range(0, len(parkingSpaceTable), batchSize):
+            rows = slice(start, start + batchSize)
+            if(np.all(parkingSpaceTable.hasDescriptor[rows])):
+                descriptors = parkingSpaceTable.descriptors[rows]
+            else:
+                descriptors = self.HOGExtractor.compute(parkingSpaceTable.crops[rows])
+            if(self.pca is not None):
+                descriptors = self.pca.transform(descriptors, self.numberOfComponents)
+
+            spaceRefs = np.empty(len(labels[rows]), dtype=self.SPACE_REF_DTYPE)
+            spaceRefs["image"] = imageNames[parkingSpaceTable.spaces["image"][rows]]
+            spaceRefs["id"] = parkingSpaceTable.spaces["id"][rows]
+            yield (np.ascontiguousarray(descriptors, dtype=np.float32), labels[rows], spaceRefs)
+
+
+    '''
+    Spojí prvých {batchSize} riadkov z častí {parts} do jedného bloku, vráti (blok, zvyšné časti)
+    '''
+    @staticmethod
+    def splitBatch(parts, batchSize):
+        batch = tuple(np.concatenate(column) for column in zip(*parts))
+        rest = tuple(column[batchSize:] for column in batch)
+        batch = tuple(column[:batchSize] for column in batch)
 
+        return (batch, [rest] if len(rest[1]) else [])
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+'''
+Trieda Evaluation vyhodnocuje klasifikáciu celého datasetu naraz nad poliami (skutočná trieda, predikcia, obrázok, id miesta)
+    - Nič nevypisuje, vracia NumPy polia alebo slovníky, takže sa dá spustiť po každej konfigurácii sweepu
+    - Matica zámen: riadky = skutočná trieda (0 = voľné, 1 = obsadené), stĺpce = predikcia
+    - Chyby po obrázkoch, chybovosť po id parkovacieho miesta (cez všetky obrázky) a N najhorších obrázkov
+'''
+class Evaluation:
+
+    WORST_IMAGE_DTYPE = np.dtype([("image", "U64"), ("index", "i8"), ("errors", "i8"), ("spaces", "i8")])
+    SPACE_ERROR_DTYPE = np.dtype([("id", "i4"), ("frames", "i8"), ("errors", "i8"), ("errorRate", "f8")])
+
+    def __init__(self, labels, predictions, imageIndexes, spaceIds, imageNames):
+        self.labels = np.asarray(labels, dtype=np.int8)
+        self.predictions = np.asarray(predictions, dtype=np.int8)
+        self.imageIndexes = np.asarray(imageIndexes, dtype=np.int64)
+        self.spaceIds = np.asarray(spaceIds, dtype=np.int32)
+        self.imageNames = list(imageNames)
+
+        if(not (len(self.labels) == len(self.predictions) == len(self.imageIndexes) == len(self.spaceIds))):
+            raise Exception("Evaluation - Polia musia mať rovnakú dĺžku")
+
+        # Parking spaces without prediction count as wrong (same as ParkingSpaceTable.getWrongPredictions)
+        self.wrong = self.labels != self.predictions
+
+
+    '''
+    Vytvorí vyhodnotenie z tabuľky parkovacích miest {parkingSpaceTable} (predikcie sú tie, ktoré sú v tabuľke nastavené)
+    '''
+    @classmethod
+    def fromTable(cls, parkingSpaceTable, predictions=None):
+        if(predictions is None):
+            predictions = parkingSpaceTable.spaces["predicted"]
+
+        return cls(parkingSpaceTable.getLabels(), predictions, parkingSpaceTable.spaces["image"],
+                   parkingSpaceTable.spaces["id"], parkingSpaceTable.imageNames)
+
+
+    '''
+    Vytvorí vyhodnotenie pre dataset {dataset}, s predikciami {predictions} (napr. zo SweepRunner) alebo s tými, ktoré má dataset nastavené
+    '''
+    @classmethod
+    def fromDataset(cls, dataset, predictions=None):
+        return cls.fromTable(dataset.getParkingSpaceTable(), predictions)
+
+
+    '''
+    Vráti maticu zámen 2x2 [[TN, FP], [FN, TP]] (miesta bez predikcie sa nezapočítajú)
+    '''
+    def getConfusionMatrix(self):
+        predicted = self.predictions >= 0
+        codes = self.labels[predicted].astype(np.int64) * 2 + self.predictions[predicted]
+        return np.bincount(codes, minlength=4).reshape(2, 2)
+
+
+    '''
+    Vráti úspešnosť, presnosť, návratnosť a F1 pre triedu obsadené
+    '''
+    def getMetrics(self):
+        (trueNegative, falsePositive), (falseNegative, truePositive) = self.getConfusionMatrix().tolist()
+        total = len(self.labels)
+        precision = truePositive / (truePositive + falsePositive) if truePositive + falsePositive else 0.0
+        recall = truePositive / (truePositive + falseNegative) if truePositive + falseNegative else 0.0
+
+        return {
+            "accuracy": float(np.count_nonzero(~self.wrong) / total) if total else 0.0,
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        }
+
+
+    '''
+    Vráti počet zle klasifikovaných parkovacích miest pre každý obrázok
+    '''
+    def getErrorsPerImage(self):
+        return np.bincount(self.imageIndexes[self.wrong], minlength=len(self.imageNames))
+
+
+    '''
+    Vráti chybovosť každého id parkovacieho miesta cez všetky obrázky (pole typu SPACE_ERROR_DTYPE zoradené podľa id)
+    '''
+    def getErrorRatePerSpace(self):
+        ids, inverse = np.unique(self.spaceIds, return_inverse=True)
+        frames = np.bincount(inverse, minlength=len(ids))
+        errors = np.bincount(inverse, weights=self.wrong, minlength=len(ids)).astype(np.int64)
+
+        result = np.empty(len(ids), dtype=self.SPACE_ERROR_DTYPE)
+        result["id"] = ids
+        result["frames"] = frames
+        result["errors"] = errors
+        result["errorRate"] = errors / np.maximum(frames, 1)
+        return result
+
+
+    '''
+    Vráti {count} obrázkov s najviac chybami (pole typu WORST_IMAGE_DTYPE, pri rovnosti je skôr obrázok s menším indexom)
+    '''
+    def getWorstImages(self, count=10):
+        errors = self.getErrorsPerImage()
+        spaces = np.bincount(self.imageIndexes, minlength=len(self.imageNames))
+
+        count = min(count, len(errors))
+        if(count < len(errors)):
+            # Only candidates are sorted, threshold is the count-th largest number of errors
+            threshold = np.partition(errors, len(errors) - count)[len(errors) - count]
+            candidates = np.flatnonzero(errors >= threshold)
+        else:
+            candidates = np.arange(len(errors))
+        order = candidates[np.lexsort((candidates, -errors[candidates]))][:count]
+
+        result = np.empty(len(order), dtype=self.WORST_IMAGE_DTYPE)
+        result["image"] = np.array(self.imageNames, dtype=self.WORST_IMAGE_DTYPE["image"])[order] if len(order) else []
+        result["index"] = order
+        result["errors"] = errors[order]
+        result["spaces"] = spaces[order]
+        return result
+
+
+    '''
+    Vráti celé vyhodnotenie ako slovník (dá sa uložiť do JSON)
+        - {worstImages} = počet najhorších obrázkov, {worstSpaces} = počet id parkovacích miest s najvyššou chybovosťou
+    '''
+    def getReport(self, worstImages=10, worstSpaces=10):
+        spaceErrors = self.getErrorRatePerSpace()
+        spaceErrors = spaceErrors[np.argsort(-spaceErrors["errorRate"], kind="stable")][:worstSpaces]
+
+        return {
+            **self.getMetrics(),
+            "confusionMatrix": self.getConfusionMatrix().tolist(),
+            "worstImages": [{"image": image, "errors": int(errors), "spaces": int(spaces)}
+                            for image, _, errors, spaces in self.getWorstImages(worstImages).tolist()],
+            "worstSpaces": [{"id": id, "frames": frames, "errors": errors, "errorRate": errorRate}
+                            for id, frames, errors, errorRate in spaceErrors.tolist()]
+        }
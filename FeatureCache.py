@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from Profiler import Profiler
+
+
+'''
+Trieda FeatureCache reprezentuje perzistentnú cache HOG deskriptorov pre jeden priečinok datasetu
+    - Deskriptory sú uložené v .npy súbore, ktorý sa pri čítaní iba namapuje do pamäte (mmap)
+    - Záznam je identifikovaný menom obrázku, časom zmeny a veľkosťou JPG a XML súboru a id parkovacieho miesta
+    - Parametre výpočtu (veľkosť výseku, parametre HOG) sú súčasťou mena súboru, takže pri ich zmene sa cache nepoužije
+'''
+class FeatureCache:
+
+    CACHE_DIR = ".featureCache"
+    KEY_DTYPE = np.dtype([("image", "U64"), ("stamp", "i8"), ("id", "i4")])
+
+    def __init__(self, path, parameters):
+        self.path = path
+        self.directory = f"{path}/{self.CACHE_DIR}"
+
+        # Every change of parameters creates new cache files
+        parametersKey = hashlib.sha1(json.dumps(parameters, sort_keys=True).encode()).hexdigest()[:16]
+        self.keysFileName = f"{self.directory}/{parametersKey}.keys.npy"
+        self.descriptorsFileName = f"{self.directory}/{parametersKey}.descriptors.npy"
+
+        self.imageStamps = {}
+
+        # Cache loaded once for reading by parts (see fillFromCache)
+        self.cachedRows = None
+        self.cachedDescriptors = None
+
+
+    '''
+    Vráti číslo, ktoré sa zmení pri každej zmene JPG alebo XML súboru obrázku {imageName}
+    '''
+    def getImageStamp(self, imageName):
+        if(imageName not in self.imageStamps):
+            stamp = []
+            for ext in ["jpg", "xml"]:
+                stat = os.stat(f"{self.path}/{imageName}.{ext}")
+                stamp.extend([stat.st_mtime_ns, stat.st_size])
+
+            digest = hashlib.sha1(str(stamp).encode()).digest()
+            self.imageStamps[imageName] = int.from_bytes(digest[:8], "little", signed=True)
+
+        return self.imageStamps[imageName]
+
+
+    '''
+    Vráti kľúče pre všetky parkovacie miesta v tabuľke {parkingSpaceTable}
+    '''
+    def getKeys(self, parkingSpaceTable):
+        imageNames = np.array(parkingSpaceTable.imageNames, dtype=self.KEY_DTYPE["image"])
+        imageStamps = np.array([self.getImageStamp(imageName) for imageName in parkingSpaceTable.imageNames], dtype=np.int64)
+        imageIndexes = parkingSpaceTable.spaces["image"]
+
+        keys = np.empty(len(parkingSpaceTable), dtype=self.KEY_DTYPE)
+        keys["image"] = imageNames[imageIndexes]
+        keys["stamp"] = imageStamps[imageIndexes]
+        keys["id"] = parkingSpaceTable.spaces["id"]
+
+        return keys
+
+
+    '''
+    Načíta cache z disku, vráti (kľúče, deskriptory) alebo (None, None) ak cache neexistuje
+    '''
+    def load(self):
+        try:
+            keys = np.load(self.keysFileName)
+            # Copy-on-write mapping, so changes in memory never get back to the file
+            descriptors = np.load(self.descriptorsFileName, mmap_mode="c")
+        except (OSError, ValueError):
+            return (None, None)
+
+        if(len(keys) != len(descriptors)):
+            return (None, None)
+
+        return (keys, descriptors)
+
+
+    '''
+    Uloží cache na disk (najprv do dočasného súboru, aby pri prerušení nezostala poškodená)
+    '''
+    def save(self, keys, descriptors):
+        os.makedirs(self.directory, exist_ok=True)
+
+        for fileName, array in [(self.descriptorsFileName, descriptors), (self.keysFileName, keys)]:
+            temporaryFileName = f"{fileName}.tmp"
+            with open(temporaryFileName, "wb") as file:
+                np.save(file, array)
+            os.replace(temporaryFileName, fileName)
+
+        # Cache loaded for reading by parts is outdated now
+        self.cachedRows = None
+        self.cachedDescriptors = None
+
+
+    '''
+    Vráti slovník kľúč -> riadok v cache
+    '''
+    @staticmethod
+    def getRows(cachedKeys):
+        if(cachedKeys is None):
+            return {}
+
+        return {key: row for row, key in enumerate(cachedKeys.tolist())}
+
+
+    '''
+    Vráti pre každý kľúč z {keys} riadok v cache (-1 ak v cache nie je)
+    '''
+    @staticmethod
+    def getCachedRows(keys, rows):
+        return np.array([rows.get(key, -1) for key in keys.tolist()], dtype=np.int64)
+
+
+    '''
+    Nastaví parkovacím miestam v tabuľke {parkingSpaceTable} HOG deskriptory, ktoré sú v cache (chýbajúce nedopočíta a cache neprepíše)
+        - Používa sa pri postupnom spracovaní datasetu po častiach (Dataset.iterBatches), cache sa načíta iba pri prvom volaní
+    '''
+    def fillFromCache(self, parkingSpaceTable):
+        if(self.cachedRows is None):
+            cachedKeys, self.cachedDescriptors = self.load()
+            self.cachedRows = self.getRows(cachedKeys)
+
+        cachedRows = self.getCachedRows(self.getKeys(parkingSpaceTable), self.cachedRows)
+        hits = cachedRows >= 0
+        if(np.any(hits)):
+            parkingSpaceTable.setDescriptors(np.flatnonzero(hits), self.cachedDescriptors[cachedRows[hits]])
+
+
+    '''
+    Nastaví parkovacím miestam v tabuľke {parkingSpaceTable} HOG deskriptory z cache a dopočíta iba tie, ktoré v cache chýbajú
+        - Ak cache presne zodpovedá tabuľke, matica deskriptorov sa iba namapuje do pamäte
+        - Ak niečo chýbalo, cache sa prepíše aktuálnymi deskriptormi
+    '''
+    @Profiler.profile()
+    def fill(self, parkingSpaceTable):
+        if(len(parkingSpaceTable) == 0):
+            return
+
+        keys = self.getKeys(parkingSpaceTable)
+        cachedKeys, cachedDescriptors = self.load()
+
+        if(cachedKeys is not None and cachedKeys.shape == keys.shape and np.all(cachedKeys == keys)):
+            parkingSpaceTable.setDescriptorMatrix(cachedDescriptors)
+            return
+
+        cachedRows = self.getCachedRows(keys, self.getRows(cachedKeys))
+
+        # Copy hits from cache (old file will be replaced, so table can not point into its memory map)
+        hits = cachedRows >= 0
+        if(np.any(hits)):
+            parkingSpaceTable.setDescriptors(np.flatnonzero(hits), cachedDescriptors[cachedRows[hits]])
+        cachedDescriptors = None
+
+        parkingSpaceTable.computeDescriptors()
+        self.save(keys, parkingSpaceTable.getDescriptors())
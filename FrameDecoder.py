@@ -0,0 +1,85 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from ParkingSpace import ParkingSpace
+from Profiler import Profiler
+
+
+'''
+Trieda FrameDecoder načítava obrázky parkoviska priamo v odtieňoch šedej (na výseky parkovacích miest farba nie je potrebná)
+    - {reduction} = 1, 2 alebo 4: JPEG sa dekóduje rovno v 1/2 alebo 1/4 rozlíšení (IMREAD_REDUCED_GRAYSCALE_2/4), čo je rýchlejšie
+    - Zmenšenie sa oplatí iba ak sú parkovacie miesta dosť veľké, aby sa pri zmene veľkosti na 64x128 nestratili detaily (getMaxReduction)
+    - prefetch načítava ďalšie obrázky vo vláknach, kým sa spracúva aktuálny (cv2.imread počas dekódovania uvoľní GIL)
+'''
+class FrameDecoder:
+
+    REDUCTIONS = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4}
+
+    def __init__(self, reduction=1, prefetchCount=2):
+        if(reduction not in self.REDUCTIONS):
+            raise Exception(f"FrameDecoder - Nepodporované zmenšenie {reduction} (podporované sú {list(self.REDUCTIONS)})")
+
+        self.reduction = reduction
+        self.prefetchCount = prefetchCount
+
+
+    '''
+    Vráti najväčšie zmenšenie, pri ktorom má každé parkovacie miesto s veľkosťou zo {sizes} (šírka, výška) na zmenšenom obrázku aspoň veľkosť výseku (64x128)
+    '''
+    @classmethod
+    def getMaxReduction(cls, sizes):
+        sizes = np.asarray(sizes).reshape(-1, 2)
+        if(len(sizes) == 0):
+            return 1
+
+        resizeWidth, resizeHeight = ParkingSpace.RESIZE_SIZE
+        # Crop is always rotated to portrait orientation (see ParkingSpace.cropImage)
+        cropWidth, cropHeight = sizes.min(axis=1).min(), sizes.max(axis=1).min()
+
+        reduction = 1
+        for candidate in sorted(cls.REDUCTIONS):
+            if(cropWidth / candidate >= resizeWidth and cropHeight / candidate >= resizeHeight):
+                reduction = candidate
+
+        return reduction
+
+
+    '''
+    Načíta obrázok zo súboru {fileName} v odtieňoch šedej (None, ak sa nepodarilo)
+    '''
+    @Profiler.profile()
+    def decode(self, fileName):
+        return cv2.imread(fileName, self.REDUCTIONS[self.reduction])
+
+
+    '''
+    Dekóduje obrázok z bajtov JPG súboru {data} v odtieňoch šedej (None, ak sa nepodarilo)
+    '''
+    def decodeBuffer(self, data):
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), self.REDUCTIONS[self.reduction])
+
+
+    '''
+    Postupne vracia (meno súboru, obrázok) pre všetky súbory {fileNames}, ďalších {prefetchCount} obrázkov sa medzitým načítava vo vláknach
+    '''
+    def prefetch(self, fileNames):
+        if(self.prefetchCount < 1):
+            for fileName in fileNames:
+                yield (fileName, self.decode(fileName))
+            return
+
+        fileNames = iter(fileNames)
+        with ThreadPoolExecutor(max_workers=self.prefetchCount) as executor:
+            pending = deque()
+            for fileName in fileNames:
+                pending.append((fileName, executor.submit(self.decode, fileName)))
+                if(len(pending) > self.prefetchCount):
+                    fileName, future = pending.popleft()
+                    yield (fileName, future.result())
+
+            while(pending):
+                fileName, future = pending.popleft()
+                yield (fileName, future.result())
@@ -0,0 +1,178 @@
+import cv2
+import numpy as np
+
+from Profiler import Profiler
+
+
+'''
+Trieda HOGExtractor počíta HOG deskriptory pre celé pole výsekov parkovacích miest (N x výška x šírka) naraz
+    - backend "numpy": dávkový výpočet v NumPy, výsledky zodpovedajú skimage.feature.hog (L2-Hys, bez transform_sqrt)
+    - backend "skimage": referenčný výpočet cez skimage.feature.hog po jednom výseku
+'''
+class HOGExtractor:
+
+    BACKENDS = ["numpy", "skimage"]
+
+    def __init__(self, parameters, backend="numpy", chunkSize=256):
+        if(backend not in self.BACKENDS):
+            raise Exception(f"HOGExtractor - Neznámy backend {backend}")
+
+        self.orientations = parameters["orientations"]
+        self.pixelsPerCell = parameters["pixels_per_cell"]
+        self.cellsPerBlock = parameters["cells_per_block"]
+        self.parameters = parameters
+        self.backend = backend
+
+        # Number of crops computed at once by numpy backend (bounds memory of temporary arrays)
+        self.chunkSize = chunkSize
+
+
+    '''
+    Vráti maticu HOG deskriptorov (N x D, float32) pre pole výsekov {crops}
+    '''
+    @Profiler.profile()
+    def compute(self, crops, backend=None):
+        crops = np.asarray(crops)
+        if(crops.ndim == 2):
+            crops = crops[np.newaxis]
+
+        if(backend is None):
+            backend = self.backend
+
+        if(backend == "skimage"):
+            # Reference backend only, skimage is not imported at start
+            from skimage.feature import hog
+            return np.array([hog(crop, **self.parameters) for crop in crops], dtype=np.float32).reshape(len(crops), -1)
+
+        descriptors = [self.computeChunk(crops[start:start + self.chunkSize]) for start in range(0, len(crops), self.chunkSize)]
+        if(not descriptors):
+            return np.empty((0, self.getDescriptorLength(crops.shape[1:])), dtype=np.float32)
+
+        return np.concatenate(descriptors)
+
+
+    '''
+    Vráti dĺžku HOG deskriptora pre výsek s rozmermi {shape} (výška, šírka)
+    '''
+    def getDescriptorLength(self, shape):
+        cellsRow, cellsColumn = shape[0] // self.pixelsPerCell[0], shape[1] // self.pixelsPerCell[1]
+        blocksRow, blocksColumn = cellsRow - self.cellsPerBlock[0] + 1, cellsColumn - self.cellsPerBlock[1] + 1
+        return blocksRow * blocksColumn * self.cellsPerBlock[0] * self.cellsPerBlock[1] * self.orientations
+
+
+    '''
+    Dávkový výpočet HOG deskriptorov v NumPy (rovnaké kroky ako skimage.feature.hog)
+    '''
+    def computeChunk(self, crops):
+        histogram = self.computeCellHistograms(crops)
+        count, cellsRow, cellsColumn, _ = histogram.shape
+        blockRows, blockColumns = self.cellsPerBlock
+        blocksRow, blocksColumn = cellsRow - blockRows + 1, cellsColumn - blockColumns + 1
+
+        # Blocks of neighbouring cells (count, blocksRow, blocksColumn, blockRows, blockColumns, orientations)
+        blocks = np.empty((count, blocksRow, blocksColumn, blockRows, blockColumns, self.orientations), dtype=np.float64)
+        for row in range(blockRows):
+            for column in range(blockColumns):
+                blocks[:, :, :, row, column, :] = histogram[:, row:row + blocksRow, column:column + blocksColumn, :]
+
+        # L2-Hys normalization of every block
+        eps = 1e-5
+        blocks /= np.sqrt(np.sum(blocks ** 2, axis=(3, 4, 5), keepdims=True) + eps ** 2)
+        np.minimum(blocks, 0.2, out=blocks)
+        blocks /= np.sqrt(np.sum(blocks ** 2, axis=(3, 4, 5), keepdims=True) + eps ** 2)
+
+        return blocks.reshape(count, -1).astype(np.float32)
+
+
+    '''
+    Vráti histogramy orientácií gradientov všetkých buniek výsekov {crops} (N x riadky buniek x stĺpce buniek x orientácie, float64)
+    '''
+    def computeCellHistograms(self, crops):
+        crops = np.asarray(crops).astype(np.float64)
+        if(crops.ndim == 2):
+            crops = crops[np.newaxis]
+        count, height, width = crops.shape
+        cellRows, cellColumns = self.pixelsPerCell
+        cellsRow, cellsColumn = height // cellRows, width // cellColumns
+
+        # Gradients with central differences, border rows and columns are zero
+        gradientRow = np.zeros_like(crops)
+        gradientRow[:, 1:-1, :] = crops[:, 2:, :] - crops[:, :-2, :]
+        gradientColumn = np.zeros_like(crops)
+        gradientColumn[:, :, 1:-1] = crops[:, :, 2:] - crops[:, :, :-2]
+
+        gradientRow = gradientRow[:, :cellsRow * cellRows, :cellsColumn * cellColumns]
+        gradientColumn = gradientColumn[:, :cellsRow * cellRows, :cellsColumn * cellColumns]
+        magnitude = np.sqrt(gradientRow * gradientRow + gradientColumn * gradientColumn)
+
+        # Orientation in degrees in range [0, 180), same values as (rad2deg(arctan2) % 180), but without slow float modulo
+        orientation = np.rad2deg(np.arctan2(gradientRow, gradientColumn))
+        np.add(orientation, 180, out=orientation, where=orientation < 0)
+        np.subtract(orientation, 180, out=orientation, where=orientation >= 180)
+
+        # Every pixel votes only to its orientation bin (bin edges are float32 as in skimage)
+        binEdges = (np.float32(180.0 / self.orientations) * np.arange(1, self.orientations, dtype=np.float32)).astype(np.float64)
+        bins = np.zeros(orientation.shape, dtype=np.intp)
+        for binEdge in binEdges:
+            bins += orientation >= binEdge
+
+        # Histograms of all cells of all crops in one pass (index = (crop, cell, bin))
+        cellIndexes = (np.arange(cellsRow * cellRows)[:, np.newaxis] // cellRows) * cellsColumn + np.arange(cellsColumn * cellColumns)[np.newaxis, :] // cellColumns
+        cropOffsets = np.arange(count)[:, np.newaxis, np.newaxis] * (cellsRow * cellsColumn)
+        bins += cellIndexes * self.orientations
+        bins += cropOffsets * self.orientations
+        histogram = np.bincount(bins.ravel(), weights=magnitude.ravel(), minlength=count * cellsRow * cellsColumn * self.orientations)
+        return histogram.reshape(count, cellsRow, cellsColumn, self.orientations) / (cellRows * cellColumns)
+
+
+    '''
+    Vráti vizualizáciu HOG pre výseky {crops} (N x výška x šírka, float64), rovnako ako skimage.feature.hog(visualize=True)
+        - V každej bunke je pre každú orientáciu čiara cez stred bunky s intenzitou podľa histogramu bunky
+        - Čiary jednej bunky sú vopred nakreslené do šablón, vizualizácia všetkých buniek sa zloží naraz (einsum)
+    '''
+    def visualize(self, crops):
+        crops = np.asarray(crops)
+        if(crops.ndim == 2):
+            crops = crops[np.newaxis]
+
+        histogram = self.computeCellHistograms(crops)
+        count, cellsRow, cellsColumn, _ = histogram.shape
+        cellRows, cellColumns = self.pixelsPerCell
+
+        visualization = np.zeros(crops.shape, dtype=np.float64)
+        cells = np.einsum("nrco,oyx->nrycx", histogram, self.getCellTemplates())
+        visualization[:, :cellsRow * cellRows, :cellsColumn * cellColumns] = cells.reshape(count, cellsRow * cellRows, cellsColumn * cellColumns)
+        return visualization
+
+
+    '''
+    Vráti šablóny čiar jednej bunky pre všetky orientácie (orientácie x výška bunky x šírka bunky), ako v skimage
+    '''
+    def getCellTemplates(self):
+        cellRows, cellColumns = self.pixelsPerCell
+        radius = min(cellRows, cellColumns) // 2 - 1
+        centerRow, centerColumn = cellRows // 2, cellColumns // 2
+
+        templates = np.zeros((self.orientations, cellRows, cellColumns), dtype=np.float64)
+        for orientation in range(self.orientations):
+            midpoint = np.pi * (orientation + 0.5) / self.orientations
+            dr, dc = radius * np.sin(midpoint), radius * np.cos(midpoint)
+            # cv2.line takes points as (x, y) = (column, row)
+            cv2.line(templates[orientation], (int(centerColumn + dr), int(centerRow - dc)), (int(centerColumn - dr), int(centerRow + dc)), 1.0, 1)
+
+        return templates
+
+
+    '''
+    Porovná backend {backend} s referenčným skimage výpočtom na výsekoch {crops}
+        - Vráti najväčší absolútny rozdiel, ak je väčší ako {tolerance}, vyhodí výnimku
+    '''
+    def checkBackend(self, crops, backend="numpy", tolerance=1e-4):
+        reference = self.compute(crops, "skimage")
+        descriptors = self.compute(crops, backend)
+
+        maxDifference = float(np.max(np.abs(reference - descriptors))) if reference.size else 0.0
+        if(maxDifference > tolerance):
+            raise Exception(f"HOGExtractor.checkBackend - Backend {backend} sa líši od skimage o {maxDifference}")
+
+        return maxDifference
@@ -1,9 +1,12 @@
 import cv2
-from skimage import io
 import xml.etree.ElementTree as ET
 import numpy as np
 
+from FrameDecoder import FrameDecoder
+from Layout import Layout
 from ParkingSpace import ParkingSpace
+from Profiler import Profiler
+from Renderer import Renderer
 
 
 '''
@@ -16,18 +19,30 @@ class Image:
     GREEN = (0, 255, 0)
     YELLOW = (0, 255, 255)
 
-    def __init__(self, path, name):
+    # Shared renderer for saving results, created on first save (its thread pool is not needed e.g. for inference)
+    renderer = None
+
+    def __init__(self, path, name, keepImage=True, annotations=None, frame=None, frameDecoder=None):
         # Set fileName
         fileName = f"{path}/{name}"
         self.fileName = fileName
         self.name = name
 
-        # Get image (path, mode 0 = grayscale)
-        self.loadImage(fileName)
+        # Color image of parking lot is needed only for drawing, so it is loaded when it is needed (getImage)
+        # If False, full parking lot image is not kept in memory after it was shown or saved
+        self.keepImage = keepImage
+        self.image = None
+
+        # Parking spaces are cropped from grayscale image {frame} (e.g. already decoded in background by FrameDecoder.prefetch)
+        if(frameDecoder is None):
+            frameDecoder = FrameDecoder()
+        if(frame is None):
+            frame = frameDecoder.decode(f"{fileName}.jpg")
 
         # Get parking spaces for image
+        # {annotations} from AnnotationIndex are used instead of XML file, if they are given
         try:
-            self.loadParkingSpaces(fileName)
+            self.loadParkingSpaces(fileName, annotations, frame, frameDecoder.reduction)
         except Exception as e:
             print(f"{fileName} - {e}")
 
@@ -35,30 +50,98 @@ class Image:
     '''
     Načíta obrázok s {fileName} adresov a {ext} formátom
     '''
+    @Profiler.profile()
     def loadImage(self, fileName, ext="jpg"):
             self.image = cv2.imread(f"{fileName}.{ext}", cv2.IMREAD_COLOR)
 
+
+    '''
+    Vráti obrázok parkoviska (ak nie je v pamäti, napr. po prenose z iného procesu, tak ho znova načíta)
+    '''
+    def getImage(self):
+        if(self.image is None):
+            self.loadImage(self.fileName)
+
+        return self.image
+
+
+    '''
+    Uvoľní obrázok parkoviska z pamäte (pri ďalšom použití sa znova načíta z disku)
+    '''
+    def releaseImage(self):
+        self.image = None
+
+
+    '''
+    Vráti spoločný Renderer pre ukladanie výsledkov (pri prvom použití ho vytvorí)
+    '''
+    @classmethod
+    def getRenderer(cls):
+        if(Image.renderer is None):
+            Image.renderer = Renderer(ParkingSpace.HOG_EXTRACTOR)
+
+        return Image.renderer
+
+
+    '''
+    Počká, kým sa na pozadí zapíšu všetky uložené obrázky (ak sa nič neukladalo, nerobí nič)
+    '''
+    @classmethod
+    def waitForRenderer(cls):
+        if(Image.renderer is not None):
+            Image.renderer.wait()
+
+
+    '''
+    Pri prenose medzi procesmi (pickle) sa neposiela celý obrázok parkoviska, ale iba výseky parkovacích miest
+    '''
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["image"] = None
+        return state
+
     
     '''
-    Načíta ParkingSpaces pre odpovedajúci obrázok
+    Načíta ParkingSpaces pre odpovedajúci obrázok a vyseká ich z obrázku v odtieňoch šedej {frame} (zmenšeného {reduction}-krát)
+        - Ak sú zadané {annotations} (pole anotácií, počet chýb) z AnnotationIndex, XML súbor sa neparsuje
     '''
-    def loadParkingSpaces(self, fileName):
+    @Profiler.profile()
+    def loadParkingSpaces(self, fileName, annotations=None, frame=None, reduction=1):
         # Set parkingSpaces to empty array
         self.parkingSpaces = []
 
         # Error information
         errorCounter = 0
 
-        # Get root of XML file which contains all parking spaces for image
-        # Then get all data for parking space and save them in ParkingSpace class
-        root = ET.parse(f"{fileName}.xml").getroot()
-
-        for space in root:
-            try:
-                self.parkingSpaces.append(ParkingSpace(space, self.image, self.name))
-            except:
-                errorCounter += 1
-                continue
+        if(annotations is not None):
+            spaces, errorCounter = annotations
+            self.parkingSpaces = [ParkingSpace(space, None, self.name) for space in spaces]
+        else:
+            # Get root of XML file which contains all parking spaces for image
+            # Then get all data for parking space and save them in ParkingSpace class
+            with Profiler.stage("Image.loadParkingSpaces.parseXML"):
+                root = ET.parse(f"{fileName}.xml").getroot()
+
+            for space in root:
+                try:
+                    self.parkingSpaces.append(ParkingSpace(space, None, self.name))
+                except:
+                    errorCounter += 1
+                    continue
+
+        if(frame is None):
+            self.parkingSpaces = []
+            raise Exception("Obrazok sa nepodarilo nacitat")
+
+        # Crop all parking spaces at once with layout shared by images with same parking spaces
+        # If cropping fails, image has no parking spaces (parking spaces without crops would break ParkingSpaceTable)
+        try:
+            crops = Layout.getShared(self.parkingSpaces).extractCrops(frame, reduction)
+        except Exception as e:
+            self.parkingSpaces = []
+            raise Exception(f"Vyseky sa nepodarilo ziskat - {e}")
+        for parkingSpace, crop in zip(self.parkingSpaces, crops):
+            parkingSpace.image = crop
 
         # If was error, raise error to get info
         if(errorCounter):
@@ -76,19 +159,27 @@ class Image:
     Vráti všetky miesta, pre ktoré spravil klasifikátor zlú klasifikáciu
     '''
     def getParkingSpacesWithWrongPrediction(self):
-        parkingSpacesWithWrongPrediction = []
-        for parkingSpace in self.parkingSpaces:
-            if(not parkingSpace.isPredictionCorrect()):
-                parkingSpacesWithWrongPrediction.append(parkingSpace) 
-        
-        return parkingSpacesWithWrongPrediction
+        return [parkingSpace for parkingSpace, wrong in zip(self.parkingSpaces, self.getWrongPredictions()) if wrong]
+
+
+    '''
+    Vráti masku parkovacích miest obrázku so zlou klasifikáciou
+        - Ak sú parkovacie miesta v ParkingSpaceTable, porovnajú sa naraz stĺpce tabuľky
+    '''
+    def getWrongPredictions(self):
+        if(self.parkingSpaces and self.parkingSpaces[0].table is not None):
+            table = self.parkingSpaces[0].table
+            spaces = table.spaces[[parkingSpace.index for parkingSpace in self.parkingSpaces]]
+            return spaces["predicted"] != spaces["occupied"]
+
+        return np.array([not parkingSpace.isPredictionCorrect() for parkingSpace in self.parkingSpaces], dtype=bool)
 
 
     '''
     Vráti počet parkovacích miest z chybnou klasifikáciou
     '''
     def howManyWrongPredictions(self):
-        return len(self.getParkingSpacesWithWrongPrediction())
+        return int(np.count_nonzero(self.getWrongPredictions()))
 
 
     '''
@@ -106,13 +197,14 @@ class Image:
 
     '''
     Vykreslí okraje okolo parkovacích miest
+    (pri keepImage=False sa kreslí do znova načítaného obrázku, ktorý sa uvoľní po showImage/saveImage)
     '''
     def drawParkingSpacesOnImage(self):
         for parkingSpace in self.parkingSpaces:
             color = self.GREEN
             if(parkingSpace.isOccupied()):
                 color = self.RED
-            cv2.drawContours(self.image, [parkingSpace.getRotatedRectangleBox()], 0, color, 2)
+            cv2.drawContours(self.getImage(), [parkingSpace.getRotatedRectangleBox()], 0, color, 2)
 
 
     '''
@@ -125,19 +217,22 @@ class Image:
                 color = self.RED
             if(not parkingSpace.isPredictionCorrect()):
                 color = self.YELLOW
-            cv2.drawContours(self.image, [parkingSpace.getRotatedRectangleBox()], 0, color, 2)
+            cv2.drawContours(self.getImage(), [parkingSpace.getRotatedRectangleBox()], 0, color, 2)
 
 
     '''
     Ukáže obrázok parkoviska
     '''
     def showImage(self):
-        cv2.imshow(self.fileName, self.image)
+        cv2.imshow(self.fileName, self.getImage())
         cv2.waitKey(0)
 
+        if(not self.keepImage):
+            self.releaseImage()
+
 
     '''
-    Uloží obrázok parkoviska
+    Uloží obrázok parkoviska (súbor sa zapíše na pozadí cez getRenderer)
     '''
     def saveImage(self, how="EMPTY", dir="", format="png"):
         if(how == "PREDICTION"):
@@ -145,19 +240,23 @@ class Image:
         if(how == "CORRECT"):
             self.drawParkingSpacesOnImage()
 
+        # Kept image can be drawn again while it is written, so copy is written
         fileName = f"{dir}/{self.getImageName()}.{format}" 
-        cv2.imwrite(fileName, self.image)
+        self.getRenderer().write(fileName, self.getImage().copy() if self.keepImage else self.getImage())
+
+        if(not self.keepImage):
+            self.releaseImage()
 
     
     '''
-    Uloží obrázok parkoviska do {dir} priečinka a zároveň tam uloží aj obrázky pre všetky jeho chybne klasifikované parkovacie miesta
+    Uloží obrázok parkoviska do {dir} priečinka a zároveň tam uloží aj obrázky (výsek + HOG) pre všetky jeho chybne klasifikované parkovacie miesta
+        - {contactSheet} = True: chybne klasifikované miesta sa uložia do jedného obrázku (meno obrázku _spaces)
     '''
-    def saveImageAsWorst(self, how="EMPTY", dir="", format="png"):
+    def saveImageAsWorst(self, how="EMPTY", dir="", format="png", contactSheet=False):
         self.saveImage(how, dir, format)
 
         parkingSpacesWithWrongPrediction = self.getParkingSpacesWithWrongPrediction()
-        for parkingSpace in parkingSpacesWithWrongPrediction:
-            parkingSpace.saveHOGImage(dir, format)
+        self.getRenderer().saveParkingSpaces(parkingSpacesWithWrongPrediction, dir, format, contactSheet, f"{self.getImageName()}_spaces")
 
 
     '''
@@ -0,0 +1,170 @@
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+from ChangeDetector import ChangeDetector
+from FrameDecoder import FrameDecoder
+from Layout import Layout
+from ModelArtifact import loadModel
+from ParkingSpace import ParkingSpace
+from Profiler import Profiler
+
+
+'''
+Trieda InferenceService klasifikuje obsadenosť parkovacích miest na nových obrázkoch z kamery
+    - Model a rozloženie parkoviska (Layout) sa načítajú iba raz, potom sa spracúva obrázok za obrázkom
+    - Obrázky môžu prichádzať z priečinka (watchDirectory) alebo cez lokálny HTTP server (serve)
+    - Pre každý obrázok vráti obsadenosť všetkých parkovacích miest a čas spracovania jednotlivých krokov
+    - Ak je zadaný {changeThreshold}, HOG a klasifikácia sa robia iba pre miesta, ktorých výsek sa zmenil (ChangeDetector)
+'''
+class InferenceService:
+
+    def __init__(self, classifier, layout, pca=None, numberOfComponents=None, changeThreshold=None, maxAge=None, reduction=1):
+        self.classifier = classifier
+        self.layout = layout
+        self.pca = pca
+        self.numberOfComponents = numberOfComponents
+
+        # Frames are decoded directly as grayscale, {reduction} times smaller ("auto" = by size of parking spaces in layout)
+        if(reduction == "auto"):
+            reduction = FrameDecoder.getMaxReduction([size for _, size, _ in layout.rectangles])
+        self.frameDecoder = FrameDecoder(reduction)
+
+        self.changeDetector = None
+        if(changeThreshold is not None):
+            self.changeDetector = ChangeDetector(changeThreshold, maxAge)
+
+
+    '''
+    Vytvorí službu zo súboru s modelom (SVM.save/KNN.save, model aj s PCA) a XML súboru s rozložením parkoviska
+        - Model musí byť natrénovaný na obrázkoch s rovnakým zmenšením {reduction}, inak by klasifikoval iné príznaky
+    '''
+    @classmethod
+    def fromFiles(cls, modelFileName, layoutFileName, changeThreshold=None, maxAge=None, reduction=1):
+        layout = Layout.fromXML(layoutFileName)
+        if(reduction == "auto"):
+            reduction = FrameDecoder.getMaxReduction([size for _, size, _ in layout.rectangles])
+
+        classifier, pca, numberOfComponents = loadModel(modelFileName, reduction=reduction)
+        return cls(classifier, layout, pca, numberOfComponents, changeThreshold, maxAge, reduction)
+
+
+    '''
+    Klasifikuje jeden obrázok parkoviska {frame} (v odtieňoch šedej zmenšený ako pri FrameDecoder služby, alebo BGR obrázok ako z cv2.imread)
+    '''
+    @Profiler.profile()
+    def classifyFrame(self, frame, latency=None):
+        if(latency is None):
+            latency = {}
+
+        stepStartTime = time.perf_counter()
+        crops = self.layout.extractCrops(frame, self.frameDecoder.reduction)
+        latency["crop"] = time.perf_counter() - stepStartTime
+
+        # Only changed parking spaces are classified again
+        changed = None
+        if(self.changeDetector is not None):
+            stepStartTime = time.perf_counter()
+            changed = self.changeDetector.getChangedSpaces(self.layout.ids, crops)
+            crops = crops[changed]
+            latency["changeDetection"] = time.perf_counter() - stepStartTime
+
+        stepStartTime = time.perf_counter()
+        descriptors = ParkingSpace.HOG_EXTRACTOR.compute(crops)
+        if(self.pca is not None):
+            descriptors = self.pca.transform(descriptors, self.numberOfComponents)
+        latency["features"] = time.perf_counter() - stepStartTime
+
+        stepStartTime = time.perf_counter()
+        predictions = self.classifier.makePrediction(descriptors)
+        latency["predict"] = time.perf_counter() - stepStartTime
+
+        result = {}
+        if(changed is not None):
+            predictions = self.changeDetector.update(changed, predictions)
+            result["skipped"] = int(len(changed) - np.count_nonzero(changed))
+            result["skipRate"] = round(self.changeDetector.getSkipRate(), 4)
+
+        result["spaces"] = {int(id): int(prediction) for id, prediction in zip(self.layout.ids, predictions)}
+        result["occupied"] = int(np.count_nonzero(predictions))
+        result["latencyMs"] = {step: round(seconds * 1000, 2) for step, seconds in latency.items()}
+        return result
+
+
+    '''
+    Načíta obrázok z bajtov JPG súboru {data} a klasifikuje ho (do času sa ráta aj dekódovanie)
+    '''
+    def classifyEncodedFrame(self, data):
+        startTime = time.perf_counter()
+        frame = self.frameDecoder.decodeBuffer(data)
+        if(frame is None):
+            raise Exception("InferenceService - Obrázok sa nepodarilo dekódovať")
+
+        result = self.classifyFrame(frame, {"decode": time.perf_counter() - startTime})
+        result["latencyMs"]["total"] = round((time.perf_counter() - startTime) * 1000, 2)
+        return result
+
+
+    '''
+    Klasifikuje obrázok zo súboru {fileName}
+    '''
+    def classifyFile(self, fileName):
+        with open(fileName, "rb") as file:
+            result = self.classifyEncodedFrame(file.read())
+
+        result["frame"] = os.path.basename(fileName)
+        return result
+
+
+    '''
+    Sleduje priečinok {path} a každý nový JPG obrázok klasifikuje, výsledok odovzdá funkcii {onResult}
+    '''
+    def watchDirectory(self, path, pollInterval=1.0, onResult=None, processExisting=False):
+        if(onResult is None):
+            onResult = lambda result: print(json.dumps(result), flush=True)
+
+        seen = set() if processExisting else set(os.listdir(path))
+        while(True):
+            for fileNameWithExtension in sorted(os.listdir(path)):
+                if(fileNameWithExtension in seen or not fileNameWithExtension.endswith(".jpg")):
+                    continue
+
+                seen.add(fileNameWithExtension)
+                try:
+                    onResult(self.classifyFile(f"{path}/{fileNameWithExtension}"))
+                except Exception as e:
+                    print(f"{fileNameWithExtension} - {e}")
+
+            time.sleep(pollInterval)
+
+
+    '''
+    Spustí lokálny HTTP server, ktorý na POST požiadavku s JPG obrázkom v tele vráti JSON s obsadenosťou
+    '''
+    def serve(self, host="127.0.0.1", port=8080):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                try:
+                    data = self.rfile.read(int(self.headers["Content-Length"]))
+                    body = json.dumps(service.classifyEncodedFrame(data)).encode()
+                    self.send_response(200)
+                except Exception as e:
+                    body = json.dumps({"error": str(e)}).encode()
+                    self.send_response(400)
+
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                return
+
+        HTTPServer((host, port), Handler).serve_forever()
+
@@ -1,33 +1,94 @@
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn import metrics
+from NearestNeighborIndex import NearestNeighborIndex, LSHIndex, IVFIndex
+from ModelArtifact import saveModel, loadModel
+import numpy as np
+import time
+from Profiler import Profiler
 
 '''
 Wrapper pre implementáciu KNN v sklearn
+    - backend určuje spôsob hľadania susedov:
+        - "auto", "brute": presné hľadanie v sklearn ("auto" na HOG deskriptoroch vyberie brute force)
+        - "ball_tree", "kd_tree": stromy v sklearn, iba pre dáta s najviac {MAX_TREE_DIMENSION} rozmermi (napr. po PCA), na celých HOG deskriptoroch sú mnohonásobne pomalšie ako brute
+        - "lsh", "ivf": približné hľadanie (LSHIndex, IVFIndex), {indexParameters} nastavujú pomer medzi recall a rýchlosťou
+    - sklearn sa importuje až pri vytvorení modelu, samotný import KNN je rýchly
 '''
 class KNN:
 
-    def __init__(self, nNeighbors):
-        self.knn = KNeighborsClassifier(n_neighbors=nNeighbors)
+    BACKENDS = ["auto", "brute", "ball_tree", "kd_tree", "lsh", "ivf"]
+    TREE_BACKENDS = ["ball_tree", "kd_tree"]
+    MAX_TREE_DIMENSION = 64
+
+    def __init__(self, nNeighbors, backend="auto", **indexParameters):
+        if(backend not in self.BACKENDS):
+            raise Exception(f"KNN - Neznámy backend {backend}")
+
+        self.nNeighbors = nNeighbors
+        self.backend = backend
+
+        if(backend == "lsh"):
+            self.knn = LSHIndex(nNeighbors, **indexParameters)
+        elif(backend == "ivf"):
+            self.knn = IVFIndex(nNeighbors, **indexParameters)
+        else:
+            from sklearn.neighbors import KNeighborsClassifier
+            self.knn = KNeighborsClassifier(n_neighbors=nNeighbors, algorithm=backend)
 
 
     '''
     Trénovanie na dátach z daného datasetu
     '''
+    @Profiler.profile()
     def train(self, dataset):
         # Get training data and labels
         trainingData, labels = dataset.getTrainingData()
 
         # Train
+        self.fit(trainingData, labels)
+
+
+    '''
+    Trénovanie priamo na matici dát {trainingData} a ich triedach {labels} (bez datasetu)
+        - Stromové backendy odmietne pre dáta s viac ako {MAX_TREE_DIMENSION} rozmermi
+    '''
+    @Profiler.profile()
+    def fit(self, trainingData, labels):
+        trainingData = np.ascontiguousarray(trainingData)
+        if(self.backend in self.TREE_BACKENDS and trainingData.shape[1] > self.MAX_TREE_DIMENSION):
+            raise Exception(f"KNN.fit - Backend {self.backend} je pre {trainingData.shape[1]} rozmerov pomalší ako brute, použite auto alebo PCA s najviac {self.MAX_TREE_DIMENSION} komponentmi")
+
         self.knn.fit(trainingData, labels)
 
+        # Index keeps the same array (NearestNeighborIndex converts it to float32 once), so data are not stored twice
+        self.trainingData = self.knn.data if isinstance(self.knn, NearestNeighborIndex) else trainingData
+        self.labels = np.asarray(labels)
+
+
+    '''
+    Vráti trénovacie dáta z posledného fit
+    '''
+    def getTrainingData(self):
+        return self.trainingData
+
 
     '''
     Klasifikácia dát z daného datasetu
+        - Všetky deskriptory klasifikuje naraz ako jednu maticu (ak je zadaný {chunkSize}, tak po blokoch s najviac {chunkSize} riadkami, aby sa obmedzila pamäť)
+        - Vráti pole predikcií typu int8
     '''
-    def makePrediction(self, testData):
-        predictions = []
-        for parkingSpaceHOGDescriptor in testData:
-            predictions.append(self.knn.predict([parkingSpaceHOGDescriptor])[0])
+    @Profiler.profile()
+    def makePrediction(self, testData, chunkSize=None):
+        # One contiguous matrix, so sklearn validates the input only once per chunk (data type is kept, NearestNeighborIndex casts itself)
+        testData = np.ascontiguousarray(testData)
+        predictions = np.empty(len(testData), dtype=np.int8)
+        if(len(testData) == 0):
+            return predictions
+
+        if(chunkSize is None):
+            chunkSize = len(testData)
+
+        for start in range(0, len(testData), chunkSize):
+            end = start + chunkSize
+            predictions[start:end] = self.knn.predict(testData[start:end])
 
         return predictions
 
@@ -35,11 +96,76 @@ class KNN:
     '''
     Spraví klasifikáciu, tú nastaví parkovacím miestam v datasete a vypíše úspešnosť klasifikácie
     '''
-    def predictAndSetPredictions(self, dataset):
+    def predictAndSetPredictions(self, dataset, chunkSize=None):
         testData, actualOccupancy = dataset.getTrainingData()
 
-        predictOccupancy = self.makePrediction(testData)
+        predictOccupancy = self.makePrediction(testData, chunkSize)
         dataset.setPredictions(predictOccupancy)
 
         # Model Accuracy: how often is the classifier correct?
-        print("     - Uspesnost: ", metrics.accuracy_score(actualOccupancy, predictOccupancy))
\ No newline at end of file
+        from sklearn import metrics
+        print("     - Uspesnost: ", metrics.accuracy_score(actualOccupancy, predictOccupancy))
+
+
+    '''
+    Klasifikácia datasetu po blokoch (Dataset.iterBatches), celý dataset nikdy nie je v pamäti naraz
+        - {onBatch}(predikcie, space_refs) sa volá po každom bloku (napr. pre uloženie predikcií), vypíše a vráti úspešnosť
+    '''
+    def predictOnBatches(self, dataset, batchSize=4096, onBatch=None):
+        correct = 0
+        total = 0
+        for testData, actualOccupancy, spaceRefs in dataset.iterBatches(batchSize):
+            predictOccupancy = self.makePrediction(testData)
+            correct += int(np.count_nonzero(predictOccupancy == actualOccupancy))
+            total += len(actualOccupancy)
+
+            if(onBatch is not None):
+                onBatch(predictOccupancy, spaceRefs)
+
+        accuracy = correct / total if total else 0.0
+        print("     - Uspesnost: ", accuracy)
+        return accuracy
+
+
+    '''
+    Porovná nájdených susedov s presným hľadaním (brute force) na dátach z daného datasetu a vypíše recall a časy
+        - recall = priemerný podiel skutočných {nNeighbors} najbližších susedov, ktoré backend našiel
+    '''
+    def recallReport(self, dataset):
+        testData, _ = dataset.getTrainingData()
+        testData = np.ascontiguousarray(testData, dtype=np.float32)
+
+        startTime = time.time()
+        neighbors = self.knn.kneighbors(testData, self.nNeighbors, return_distance=False)
+        searchTime = time.time() - startTime
+
+        from sklearn.neighbors import NearestNeighbors
+
+        startTime = time.time()
+        exact = NearestNeighbors(n_neighbors=self.nNeighbors, algorithm="brute").fit(self.getTrainingData())
+        exactNeighbors = exact.kneighbors(testData, return_distance=False)
+        exactTime = time.time() - startTime
+
+        found = [len(np.intersect1d(row, exactRow)) for row, exactRow in zip(neighbors, exactNeighbors)]
+        recall = float(np.mean(found)) / self.nNeighbors if found else 1.0
+
+        print(f"     - Recall ({self.backend}): {recall:.4f}")
+        print("     - Hladanie za {:.2f} sekund/y, presne hladanie za {:.2f} sekund/y".format(searchTime, exactTime))
+        return {"recall": recall, "searchTime": searchTime, "exactTime": exactTime}
+
+
+    '''
+    Uloží natrénovaný model do súboru {fileName} (aj s PCA a počtom jeho komponentov, ak sa pred klasifikáciou používa)
+        - {reduction} = zmenšenie obrázkov pri dekódovaní trénovacieho datasetu (Dataset.frameDecoder.reduction)
+    '''
+    def save(self, fileName, pca=None, numberOfComponents=None, reduction=1):
+        saveModel(fileName, self, pca, numberOfComponents, reduction)
+
+
+    '''
+    Načíta model uložený cez save (odmietne ho, ak bol natrénovaný s inou konfiguráciou príznakov)
+    '''
+    @classmethod
+    def load(cls, fileName):
+        model, _, _ = loadModel(fileName, cls.__name__)
+        return model
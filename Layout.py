@@ -0,0 +1,151 @@
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from ParkingSpace import ParkingSpace
+from Profiler import Profiler
+
+
+'''
+Trieda Layout reprezentuje rozloženie parkovacích miest jednej kamery (rotatedRect z XML)
+    - Pre každé parkovacie miesto sa raz vypočíta tabuľka pre cv2.remap, ktorá spája perspektívnu transformáciu, otočenie a zmenu veľkosti
+    - Výseky všetkých parkovacích miest sa potom získajú jedným volaním cv2.remap z obrázku v odtieňoch šedej (FrameDecoder)
+    - Obrázok môže byť dekódovaný v zmenšenom rozlíšení, tabuľky sa pre každé zmenšenie prepočítajú raz
+    - Obrázky s rovnakým rozložením (v PUCPR majú všetky obrázky jednej kamery rovnaké) zdieľajú jeden Layout (getShared)
+'''
+class Layout:
+
+    # Identification of crop method (part of FeatureCache key, crops are not bit-identical with ParkingSpace.setImage)
+    # Frames are decoded directly as grayscale (JPEG luma), not converted from color image
+    CROP_METHOD = "remap-grayscale"
+
+    # OpenCV can not remap to image with more than SHRT_MAX rows
+    MAX_REMAP_ROWS = 32767
+
+    # Shared layouts, the least recently used is removed when there are too many of them
+    MAX_SHARED_LAYOUTS = 8
+    sharedLayouts = OrderedDict()
+
+    def __init__(self, parkingSpaces):
+        self.ids = np.array([parkingSpace.id for parkingSpace in parkingSpaces], dtype=np.int32)
+        self.rectangles = [(parkingSpace.center, parkingSpace.size, parkingSpace.angle) for parkingSpace in parkingSpaces]
+
+        # Remap tables of all parking spaces are stacked under each other, one cv2.remap call then crops many spaces
+        width, height = ParkingSpace.RESIZE_SIZE
+        self.spacesPerRemap = max(1, self.MAX_REMAP_ROWS // height)
+        self.tables = []
+        for start in range(0, len(parkingSpaces), self.spacesPerRemap):
+            tables = [self.getRemapTable(parkingSpace) for parkingSpace in parkingSpaces[start:start + self.spacesPerRemap]]
+            self.tables.append((np.concatenate([mapX for mapX, _ in tables]), np.concatenate([mapY for _, mapY in tables])))
+
+        # Fixed point maps for every reduction of frame (see getMaps)
+        self.maps = {}
+
+
+    '''
+    Vytvorí rozloženie z XML súboru {fileName} (rovnaký formát ako XML súbory v PUCPR)
+    '''
+    @classmethod
+    def fromXML(cls, fileName):
+        parkingSpaces = []
+        root = ET.parse(fileName).getroot()
+        for space in root:
+            try:
+                parkingSpaces.append(ParkingSpace(space, None, fileName))
+            except:
+                continue
+
+        return cls(parkingSpaces)
+
+
+    '''
+    Vráti rozloženie pre parkovacie miesta {parkingSpaces}, ak už bolo vytvorené pre iný obrázok, použije sa znova
+    '''
+    @classmethod
+    def getShared(cls, parkingSpaces):
+        key = tuple((parkingSpace.id, parkingSpace.center, parkingSpace.size, parkingSpace.angle) for parkingSpace in parkingSpaces)
+        if(key in cls.sharedLayouts):
+            cls.sharedLayouts.move_to_end(key)
+            return cls.sharedLayouts[key]
+
+        layout = cls(parkingSpaces)
+        cls.sharedLayouts[key] = layout
+        if(len(cls.sharedLayouts) > cls.MAX_SHARED_LAYOUTS):
+            cls.sharedLayouts.popitem(last=False)
+
+        return layout
+
+
+    '''
+    Vráti tabuľku (mapX, mapY) pre cv2.remap, ktorá pre každý pixel výseku určí jeho súradnice na obrázku parkoviska
+        - Robí v opačnom poradí to isté ako ParkingSpace.cropImage: zmena veľkosti, otočenie, perspektívna transformácia
+    '''
+    @staticmethod
+    def getRemapTable(parkingSpace):
+        width, height = parkingSpace.size
+        resizeWidth, resizeHeight = ParkingSpace.RESIZE_SIZE
+
+        # Size of image before resize (after rotation, if height < width)
+        rotate = height < width
+        cropWidth, cropHeight = (height, width) if rotate else (width, height)
+
+        # Inverse of cv2.resize (INTER_LINEAR), coordinates are clamped like border of resized image
+        x = (np.arange(resizeWidth, dtype=np.float64) + 0.5) * (cropWidth / resizeWidth) - 0.5
+        y = (np.arange(resizeHeight, dtype=np.float64) + 0.5) * (cropHeight / resizeHeight) - 0.5
+        x, y = np.meshgrid(np.clip(x, 0, cropWidth - 1), np.clip(y, 0, cropHeight - 1))
+
+        # Inverse of cv2.ROTATE_90_COUNTERCLOCKWISE
+        if(rotate):
+            x, y = width - 1 - y, x
+
+        # Inverse of perspective transformation
+        M = np.linalg.inv(parkingSpace.getPerspectiveTransform())
+        denominator = M[2, 0] * x + M[2, 1] * y + M[2, 2]
+        mapX = (M[0, 0] * x + M[0, 1] * y + M[0, 2]) / denominator
+        mapY = (M[1, 0] * x + M[1, 1] * y + M[1, 2]) / denominator
+
+        return (mapX.astype(np.float32), mapY.astype(np.float32))
+
+
+    '''
+    Vráti tabuľky pre cv2.remap pre obrázok zmenšený {reduction}-krát (pri prvom použití ich vypočíta)
+    '''
+    def getMaps(self, reduction=1):
+        if(reduction not in self.maps):
+            maps = []
+            for mapX, mapY in self.tables:
+                # Pixel i of reduced frame covers pixels [i * reduction, (i + 1) * reduction) of full frame
+                if(reduction != 1):
+                    mapX = (mapX + 0.5) / reduction - 0.5
+                    mapY = (mapY + 0.5) / reduction - 0.5
+
+                # Fixed point maps are faster for cv2.remap
+                maps.append(cv2.convertMaps(mapX, mapY, cv2.CV_16SC2))
+            self.maps[reduction] = maps
+
+        return self.maps[reduction]
+
+
+    def __len__(self):
+        return len(self.ids)
+
+
+    '''
+    Vráti výseky všetkých parkovacích miest z obrázku parkoviska {frame} zmenšeného {reduction}-krát (N x 128 x 64, uint8)
+        - {frame} má byť v odtieňoch šedej (FrameDecoder), farebný obrázok (BGR ako z cv2.imread) sa najprv prevedie
+    '''
+    @Profiler.profile()
+    def extractCrops(self, frame, reduction=1):
+        if(frame.ndim == 3):
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        width, height = ParkingSpace.RESIZE_SIZE
+        crops = np.empty((len(self), height, width), dtype=np.uint8)
+        for index, (map1, map2) in enumerate(self.getMaps(reduction)):
+            start = index * self.spacesPerRemap
+            remapped = cv2.remap(frame, map1, map2, cv2.INTER_LINEAR)
+            crops[start:start + len(remapped) // height] = remapped.reshape(-1, height, width)
+
+        return crops
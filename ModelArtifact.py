@@ -0,0 +1,82 @@
+import json
+import pickle
+
+from Layout import Layout
+from ParkingSpace import ParkingSpace
+
+
+'''
+Uloženie a načítanie natrénovaných modelov (SVM, KNN, PCA) do verzovaného súboru
+    - Súbor obsahuje aj konfiguráciu výpočtu príznakov (parametre HOG, veľkosť výseku, spôsob orezania, zmenšenie pri dekódovaní, PCA)
+    - Pri načítaní sa model odmietne, ak bol natrénovaný na príznakoch s inou konfiguráciou, než má aktuálny extraktor
+    - Súbory bez zmenšenia (staršie) sa považujú za natrénované na obrázkoch v plnom rozlíšení (zmenšenie 1)
+'''
+
+ARTIFACT_FORMAT = "bakalarska_praca.model"
+ARTIFACT_VERSION = 1
+
+
+'''
+Vráti konfiguráciu výpočtu príznakov aktuálneho extraktora pre obrázky dekódované {reduction}-krát zmenšené (FrameDecoder)
+'''
+def getFeatureConfiguration(reduction=1):
+    return {**ParkingSpace.getFeatureParameters(), "crop": Layout.CROP_METHOD, "reduction": reduction}
+
+
+'''
+Vráti konfiguráciu v podobe, v akej sa dá porovnať s konfiguráciou načítanou zo súboru (tuple vs list)
+'''
+def normalizeConfiguration(configuration):
+    return json.loads(json.dumps(configuration, sort_keys=True))
+
+
+'''
+Uloží model {model} (SVM/KNN/PCA wrapper) do súboru {fileName}
+    - Pre klasifikátor sa dá uložiť aj PCA {pca}, ktoré sa používa pred ním, a počet jeho komponentov
+    - {reduction} = zmenšenie obrázkov pri dekódovaní, na ktorých bol model natrénovaný (Dataset.frameDecoder.reduction)
+'''
+def saveModel(fileName, model, pca=None, numberOfComponents=None, reduction=1):
+    if(pca is not None and numberOfComponents is None):
+        numberOfComponents = pca.numberOfComponents
+
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": ARTIFACT_VERSION,
+        "type": type(model).__name__,
+        "features": normalizeConfiguration(getFeatureConfiguration(reduction)),
+        "pcaComponents": numberOfComponents,
+        "model": model,
+        "pca": pca
+    }
+
+    with open(fileName, "wb") as file:
+        pickle.dump(artifact, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+'''
+Načíta model zo súboru {fileName}, vráti (model, PCA, počet komponentov PCA)
+    - Ak je zadaný {modelType} (napr. "SVM"), súbor musí obsahovať model tohto typu
+    - Ak je zadané {reduction}, model musí byť natrénovaný na obrázkoch s rovnakým zmenšením pri dekódovaní
+'''
+def loadModel(fileName, modelType=None, reduction=None):
+    with open(fileName, "rb") as file:
+        artifact = pickle.load(file)
+
+    if(not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT):
+        raise Exception(f"ModelArtifact - {fileName} nie je súbor s modelom")
+    if(artifact["version"] != ARTIFACT_VERSION):
+        raise Exception(f"ModelArtifact - Nepodporovaná verzia {artifact['version']} (podporovaná je {ARTIFACT_VERSION})")
+    if(modelType is not None and artifact["type"] != modelType):
+        raise Exception(f"ModelArtifact - Súbor obsahuje {artifact['type']}, nie {modelType}")
+
+    # Reduction is compared separately, artifacts saved before it was recorded were trained on full resolution
+    features = {**artifact["features"]}
+    modelReduction = features.pop("reduction", 1)
+    currentFeatures = normalizeConfiguration(getFeatureConfiguration())
+    currentFeatures.pop("reduction")
+    if(features != currentFeatures):
+        raise Exception(f"ModelArtifact - Model bol natrénovaný s inou konfiguráciou príznakov: {artifact['features']}")
+    if(reduction is not None and reduction != modelReduction):
+        raise Exception(f"ModelArtifact - Model bol natrénovaný na obrázkoch so zmenšením {modelReduction}, nie {reduction}")
+
+    return (artifact["model"], artifact["pca"], artifact["pcaComponents"])
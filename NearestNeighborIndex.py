@@ -0,0 +1,265 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+'''
+Trieda NearestNeighborIndex je základ približného hľadania najbližších susedov pre KNN (rozhranie ako sklearn: fit, kneighbors, predict)
+    - Potomkovia rozdelia trénovacie dáta do skupín (buckety, zoznamy) a pre dotazy vrátia skupiny, ktoré majú prehľadať (getCandidates)
+    - Vzdialenosti sa počítajú iba ku kandidátom po skupinách: všetky dotazy jednej skupiny naraz jedným násobením matíc (žiadny cyklus cez dotazy)
+    - Ak má dotaz menej kandidátov ako susedov, vyhodnotí sa presne cez všetky trénovacie dáta
+    - Potomkovia implementujú buildIndex a getCandidates
+'''
+class NearestNeighborIndex(ABC):
+
+    def __init__(self, nNeighbors, seed=0):
+        self.nNeighbors = nNeighbors
+        self.random = np.random.default_rng(seed)
+
+
+    '''
+    Uloží trénovacie dáta a postaví index
+    '''
+    def fit(self, data, labels):
+        self.data = np.ascontiguousarray(data, dtype=np.float32)
+        self.squaredNorms = np.einsum("ij,ij->i", self.data, self.data)
+        self.labels = np.asarray(labels)
+        self.classes, self.labelIndexes = np.unique(self.labels, return_inverse=True)
+        self.buildIndex()
+        return self
+
+
+    '''
+    Postaví index nad self.data
+    '''
+    @abstractmethod
+    def buildIndex(self):
+        pass
+
+
+    '''
+    Postupne vracia kolá kandidátov pre {queries}: zoznam skupín (indexy dotazov, indexy trénovacích dát, ktoré tieto dotazy prehľadajú)
+        - Skupiny jedného kola majú rôzne trénovacie dáta (napr. buckety jednej LSH tabuľky)
+        - Jeden trénovací riadok môže byť pre ten istý dotaz vo viacerých kolách (napr. v LSH vo viacerých tabuľkách)
+    '''
+    @abstractmethod
+    def getCandidates(self, queries):
+        pass
+
+
+    '''
+    Vráti indexy {nNeighbors} najbližších trénovacích dát pre každý dotaz (n_queries x nNeighbors)
+        - Dotazy sa spracujú po blokoch s najviac {blockSize} dotazmi (obmedzuje veľkosť matíc vzdialeností skupín)
+    '''
+    def kneighbors(self, queries, n_neighbors=None, return_distance=False, blockSize=4096):
+        if(n_neighbors is None):
+            n_neighbors = self.nNeighbors
+
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        squaredDistances = np.empty((len(queries), n_neighbors), dtype=np.float32)
+        neighbors = np.empty((len(queries), n_neighbors), dtype=np.int64)
+        for start in range(0, len(queries), blockSize):
+            end = start + blockSize
+            squaredDistances[start:end], neighbors[start:end] = self.searchCandidates(queries[start:end], n_neighbors)
+
+        return self.sortNeighbors(queries, squaredDistances, neighbors, return_distance)
+
+
+    '''
+    Hľadanie {nNeighbors} najbližších susedov iba medzi kandidátmi, vráti (štvorce vzdialeností bez |dotaz|^2, indexy)
+        - Pre každý dotaz sa drží priebežných {nNeighbors} najlepších, po každom kole sa spoja so vzdialenosťami jeho kandidátov
+        - Čas aj pamäť závisia iba od počtu kandidátov (žiadna matica dotazy x všetky trénovacie dáta)
+    '''
+    def searchCandidates(self, queries, nNeighbors):
+        # Best neighbors found so far for every query (-1 = not found yet)
+        squaredDistances = np.full((len(queries), nNeighbors), np.inf, dtype=np.float32)
+        neighbors = np.full((len(queries), nNeighbors), -1, dtype=np.int64)
+        for groups in self.getCandidates(queries):
+            # Candidates of round are packed per query into rows as wide as the largest count of candidates of one query
+            counts = np.zeros(len(queries), dtype=np.int64)
+            for queryIndexes, members in groups:
+                counts[queryIndexes] += len(members)
+            if(not counts.any()):
+                continue
+
+            roundDistances = np.full((len(queries), counts.max()), np.inf, dtype=np.float32)
+            roundNeighbors = np.full((len(queries), counts.max()), -1, dtype=np.int64)
+            offsets = np.zeros(len(queries), dtype=np.int64)
+            for queryIndexes, members in groups:
+                if(len(queryIndexes) == 0 or len(members) == 0):
+                    continue
+
+                # Squared euclidean distance (without |query|^2) of all queries of group to all its members at once
+                columns = offsets[queryIndexes, np.newaxis] + np.arange(len(members))
+                roundDistances[queryIndexes[:, np.newaxis], columns] = self.squaredNorms[members] - 2 * (queries[queryIndexes] @ self.data[members].T)
+                roundNeighbors[queryIndexes[:, np.newaxis], columns] = members
+                offsets[queryIndexes] += len(members)
+
+            # Candidates already found in previous round (e.g. other LSH table) are not added again
+            found = (roundNeighbors[:, :, np.newaxis] == neighbors[:, np.newaxis, :]).any(axis=2)
+            roundDistances[found] = np.inf
+
+            allDistances = np.concatenate([squaredDistances, roundDistances], axis=1)
+            allNeighbors = np.concatenate([neighbors, roundNeighbors], axis=1)
+            nearest = np.argpartition(allDistances, nNeighbors - 1, axis=1)[:, :nNeighbors]
+            squaredDistances = np.take_along_axis(allDistances, nearest, axis=1)
+            neighbors = np.take_along_axis(allNeighbors, nearest, axis=1)
+
+        # Queries with less candidates than neighbors are searched exactly
+        missing = np.flatnonzero(np.any(np.isinf(squaredDistances), axis=1))
+        if(len(missing)):
+            squaredDistances[missing], neighbors[missing] = self.searchExact(queries[missing], nNeighbors)
+
+        return (squaredDistances, neighbors)
+
+
+    '''
+    Presné hľadanie {nNeighbors} najbližších susedov pre všetky dotazy naraz, vráti (štvorce vzdialeností bez |dotaz|^2, indexy)
+    '''
+    def searchExact(self, queries, nNeighbors):
+        squaredDistances = self.squaredNorms - 2 * (queries @ self.data.T)
+        nearest = np.argpartition(squaredDistances, nNeighbors - 1, axis=1)[:, :nNeighbors]
+        return (np.take_along_axis(squaredDistances, nearest, axis=1), nearest)
+
+
+    '''
+    Zoradí nájdených susedov podľa vzdialenosti a vráti ich v tvare ako sklearn kneighbors
+    '''
+    def sortNeighbors(self, queries, squaredDistances, neighbors, returnDistance):
+        order = np.argsort(squaredDistances, axis=1)
+        neighbors = np.take_along_axis(neighbors, order, axis=1)
+        if(not returnDistance):
+            return neighbors
+
+        squaredDistances = np.take_along_axis(squaredDistances, order, axis=1) + np.einsum("ij,ij->i", queries, queries)[:, np.newaxis]
+        return (np.sqrt(np.maximum(squaredDistances, 0)), neighbors)
+
+
+    '''
+    Klasifikácia väčšinovým hlasovaním susedov (pri rovnosti vyhrá menšia trieda, ako v sklearn)
+    '''
+    def predict(self, queries):
+        neighborLabels = self.labelIndexes[self.kneighbors(queries)]
+        votes = np.zeros((len(neighborLabels), len(self.classes)), dtype=np.int64)
+        np.add.at(votes, (np.arange(len(neighborLabels))[:, np.newaxis], neighborLabels), 1)
+        return self.classes[np.argmax(votes, axis=1)]
+
+
+
+'''
+Približné hľadanie susedov cez locality-sensitive hashing s náhodnými projekciami
+    - Každá z {numberOfTables} tabuliek hashuje dáta podľa znamienok {numberOfBits} náhodných projekcií
+    - Projekcie sú náhodné smery v podpriestore {numberOfDimensions} hlavných komponentov dát (HOG dáta majú väčšinu rozptylu v málo smeroch,
+      úplne náhodné smery v 3780 rozmeroch ich delia zle a na recall 0.9 treba prehľadať asi štvrtinu dát)
+    - Multi-probe: dotaz prehľadá aj buckety, ktoré sa líšia v {numberOfProbes} najneistejších bitoch (projekcia najbližšie k nule)
+    - Viac tabuliek alebo probe = lepší recall, viac bitov = menej kandidátov a rýchlejšie hľadanie
+    - Predvolené nastavenie (4 tabuľky po 10 bitov, 4 probe, 16 komponentov) má na HOG deskriptoroch recall nad 0.95 a je asi 4-krát rýchlejšie ako brute
+'''
+class LSHIndex(NearestNeighborIndex):
+
+    def __init__(self, nNeighbors, numberOfTables=4, numberOfBits=10, numberOfProbes=4, numberOfDimensions=16, sampleSize=2048, seed=0):
+        super().__init__(nNeighbors, seed)
+        self.numberOfTables = numberOfTables
+        self.numberOfBits = numberOfBits
+        self.numberOfProbes = numberOfProbes
+        self.numberOfDimensions = numberOfDimensions
+        self.sampleSize = sampleSize
+
+
+    '''
+    Vráti projekcie každého riadku {data} (n x numberOfTables x numberOfBits), hash tvoria ich znamienka
+    '''
+    def getProjections(self, data):
+        return ((data - self.mean) @ self.projections).reshape(len(data), self.numberOfTables, self.numberOfBits)
+
+
+    '''
+    Vráti hash pre každú tabuľku z projekcií {projected} (n x numberOfTables)
+    '''
+    def getHashes(self, projected):
+        return (projected > 0) @ (1 << np.arange(self.numberOfBits, dtype=np.int64))
+
+
+    def buildIndex(self):
+        self.mean = self.data.mean(axis=0)
+
+        # Principal directions of random sample of centered data (randomized SVD, full SVD of 3780 columns is slow)
+        sample = self.data[self.random.choice(len(self.data), min(self.sampleSize, len(self.data)), replace=False)] - self.mean
+        basis = self.random.standard_normal((sample.shape[1], 2 * self.numberOfDimensions)).astype(np.float32)
+        for _ in range(3):
+            basis = np.linalg.qr(sample.T @ (sample @ basis))[0]
+        components = np.linalg.svd(sample @ basis, full_matrices=False)[2][:self.numberOfDimensions] @ basis.T
+        directions = self.random.standard_normal((len(components), self.numberOfTables * self.numberOfBits))
+        self.projections = (components.T @ directions).astype(np.float32)
+
+        self.tables = []
+        hashes = self.getHashes(self.getProjections(self.data))
+        for table in range(self.numberOfTables):
+            order = np.argsort(hashes[:, table], kind="stable")
+            keys, starts = np.unique(hashes[order, table], return_index=True)
+            self.tables.append({key: bucket for key, bucket in zip(keys.tolist(), np.split(order, starts[1:]))})
+
+
+    def getCandidates(self, queries):
+        projected = self.getProjections(queries)
+        hashes = self.getHashes(projected)
+
+        # Multi-probe: bits with projection closest to zero flip most easily, buckets differing in them are searched too
+        numberOfProbes = min(self.numberOfProbes, self.numberOfBits)
+        flipped = np.argsort(np.abs(projected), axis=2)[:, :, :numberOfProbes]
+        probes = np.concatenate([hashes[:, :, np.newaxis], hashes[:, :, np.newaxis] ^ (1 << flipped)], axis=2)
+        queryIndexes = np.repeat(np.arange(len(queries)), numberOfProbes + 1)
+
+        # One round per table, queries probing same bucket search it together (one query probes different buckets of table)
+        for table, buckets in enumerate(self.tables):
+            tableProbes = probes[:, table].ravel()
+            order = np.argsort(tableProbes, kind="stable")
+            keys, starts = np.unique(tableProbes[order], return_index=True)
+            yield [(group, buckets[key]) for key, group in zip(keys.tolist(), np.split(queryIndexes[order], starts[1:])) if key in buckets]
+
+
+
+'''
+Približné hľadanie susedov cez invertovaný index (IVF)
+    - Dáta sa rozdelia k-means do {numberOfLists} zoznamov, dotaz prehľadá iba {numberOfProbes} zoznamov s najbližšími centrami
+    - Viac prehľadaných zoznamov = lepší recall, ale pomalšie hľadanie
+'''
+class IVFIndex(NearestNeighborIndex):
+
+    def __init__(self, nNeighbors, numberOfLists=64, numberOfProbes=4, iterations=10, seed=0):
+        super().__init__(nNeighbors, seed)
+        self.numberOfLists = numberOfLists
+        self.numberOfProbes = numberOfProbes
+        self.iterations = iterations
+
+
+    '''
+    Vráti indexy {count} najbližších centier pre každý riadok {data}
+    '''
+    def getNearestCentroids(self, data, count=1):
+        squaredDistances = np.einsum("ij,ij->i", self.centroids, self.centroids) - 2 * (data @ self.centroids.T)
+        if(count == 1):
+            return np.argmin(squaredDistances, axis=1)[:, np.newaxis]
+
+        return np.argpartition(squaredDistances, count - 1, axis=1)[:, :count]
+
+
+    def buildIndex(self):
+        numberOfLists = min(self.numberOfLists, len(self.data))
+        self.centroids = self.data[self.random.choice(len(self.data), numberOfLists, replace=False)].copy()
+
+        # Lloyd's k-means
+        for _ in range(self.iterations):
+            assignments = self.getNearestCentroids(self.data)[:, 0]
+            order = np.argsort(assignments, kind="stable")
+            listIndexes, starts, counts = np.unique(assignments[order], return_index=True, return_counts=True)
+            self.centroids[listIndexes] = np.add.reduceat(self.data[order], starts) / counts[:, np.newaxis]
+
+        assignments = self.getNearestCentroids(self.data)[:, 0]
+        self.lists = [np.flatnonzero(assignments == listIndex) for listIndex in range(numberOfLists)]
+
+
+    def getCandidates(self, queries):
+        # Lists are disjoint, all of them are one round
+        probes = self.getNearestCentroids(queries, min(self.numberOfProbes, len(self.lists)))
+        yield [(np.flatnonzero(np.any(probes == listIndex, axis=1)), members) for listIndex, members in enumerate(self.lists)]
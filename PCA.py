@@ -1,17 +1,87 @@
-import sklearn
-from sklearn.decomposition import PCA
+import numpy as np
+
+from ModelArtifact import saveModel, loadModel
+from Profiler import Profiler
 
 '''
 Wrapper pre implementáciu PCA v sklearn
+    - Fituje sa raz s maximálnou dimenziou, menšie dimenzie sa získajú iba použitím prvých komponentov
+    - solver: "auto", "full", "randomized" (sklearn PCA) alebo "incremental" (IncrementalPCA, dáta sa spracujú po blokoch)
+    - {seed} fixuje náhodnosť solvera (randomized/arpack, "auto" ich vyberá podľa veľkosti dát), rovnaké dáta dajú rovnaké komponenty
+    - sklearn sa importuje až pri vytvorení PCA, samotný import modulu je rýchly
 '''
 class PCA:
 
-    def __init__(self, numberOfComponents=2):
-        self.pca = sklearn.decomposition.PCA(n_components=numberOfComponents)
+    def __init__(self, numberOfComponents=2, solver="auto", seed=0):
+        self.numberOfComponents = numberOfComponents
+        self.solver = solver
+        self.seed = seed
+        self.fitted = False
+
+        if(solver == "incremental"):
+            from sklearn.decomposition import IncrementalPCA
+            self.pca = IncrementalPCA(n_components=numberOfComponents)
+        else:
+            import sklearn.decomposition
+            self.pca = sklearn.decomposition.PCA(n_components=numberOfComponents, svd_solver=solver, random_state=seed)
+
+
+    '''
+    Nafituje PCA na dátach (počet komponentov sa zmenší, ak je dát alebo ich dimenzií menej)
+    '''
+    @Profiler.profile()
+    def fit(self, data):
+        numberOfComponents = min(self.numberOfComponents, *np.shape(data))
+        if(numberOfComponents != self.numberOfComponents):
+            self.numberOfComponents = numberOfComponents
+            self.pca.set_params(n_components=numberOfComponents)
+
+        self.pca.fit(data)
+        self.fitted = True
+        return self
+
+
+    '''
+    Vráti true/false podľa toho, či už bolo PCA nafitované
+    '''
+    def isFitted(self):
+        return self.fitted
+
+
+    '''
+    Vráti dáta premietnuté do prvých {numberOfComponents} komponentov (bez nového fitovania)
+    '''
+    @Profiler.profile()
+    def transform(self, data, numberOfComponents=None):
+        if(numberOfComponents is None):
+            numberOfComponents = self.numberOfComponents
+        if(numberOfComponents > self.numberOfComponents):
+            raise Exception(f"PCA.transform - PCA má iba {self.numberOfComponents} komponentov")
+
+        # Same as sklearn transform (without whitening), but only with first components
+        components = self.pca.components_[:numberOfComponents].astype(np.float32)
+        mean = self.pca.mean_.astype(np.float32)
+        return (np.asarray(data, dtype=np.float32) - mean) @ components.T
 
 
     '''
     Vráti upravené dáta (majú dimenziu podľa toho, ako bolo PCA initnuté)
     '''
-    def fitAndTransform(self, data):
-        return self.pca.fit_transform(data)
\ No newline at end of file
+    def fitAndTransform(self, data, numberOfComponents=None):
+        return self.fit(data).transform(data, numberOfComponents)
+
+
+    '''
+    Uloží nafitované PCA do súboru {fileName}
+    '''
+    def save(self, fileName):
+        saveModel(fileName, self)
+
+
+    '''
+    Načíta PCA uložené cez save
+    '''
+    @classmethod
+    def load(cls, fileName):
+        model, _, _ = loadModel(fileName, cls.__name__)
+        return model
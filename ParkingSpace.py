@@ -1,28 +1,107 @@
 import cv2
 import numpy as np
 
-from skimage.transform import rotate
-from skimage.feature import hog
-from skimage import data, exposure
-import matplotlib.pyplot as plt
+from HOGExtractor import HOGExtractor
+from Profiler import Profiler
+
+
+'''
+Atribút parkovacieho miesta, ktorý je po pripojení k ParkingSpaceTable uložený v tabuľke a nie v objekte
+'''
+class ParkingSpaceField:
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, parkingSpace, owner=None):
+        if(parkingSpace is None):
+            return self
+        if(parkingSpace.table is None):
+            try:
+                return parkingSpace.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(self.name)
+
+        return parkingSpace.table.getValue(self.name, parkingSpace.index)
+
+    def __set__(self, parkingSpace, value):
+        if(parkingSpace.table is None):
+            parkingSpace.__dict__[self.name] = value
+        else:
+            parkingSpace.table.setValue(self.name, parkingSpace.index, value)
+
 
 '''
 Trieda ParkingSpace reprezentuje jedno konkrétne parkovacie miesto
     - Drží v sebe o ňom údaje vo formáte rotatedRectangle => má (x,y) koordináty stredu, šírku a výšku a uhoľ otočenia
     - Tak isto si drží obrázok tohto parkovacieho miesta (ten je vyseknutý z obrázku parkoviska + v prípade potreby je otočený, aby bol na výšku)
+    - Po pripojení k ParkingSpaceTable (attach) sú tieto údaje uložené v tabuľke a objekt je iba pohľadom na jej riadok
 '''
 class ParkingSpace:
+
+    # Size of parking space image and parameters of HOG descriptor (every descriptor in project is computed with them)
+    RESIZE_SIZE = (64, 128)
+    HOG_PARAMETERS = {"orientations": 9, "pixels_per_cell": (8, 8), "cells_per_block": (2, 2)}
+    HOG_EXTRACTOR = HOGExtractor(HOG_PARAMETERS)
+
+    id = ParkingSpaceField()
+    center = ParkingSpaceField()
+    size = ParkingSpaceField()
+    angle = ParkingSpaceField()
+    occupied = ParkingSpaceField()
+    predictOccupied = ParkingSpaceField()
+    image = ParkingSpaceField()
+    HOGDescriptor = ParkingSpaceField()
     
     def __init__(self, parkingSpaceInfo, image, imageName):
+        self.table = None
+        self.index = None
+
         self.predictOccupied = None
         self.HOGDescriptor = None
 
-        # Get parameters about parking space
-        self.setInfo(parkingSpaceInfo)
+        # Get parameters about parking space (from XML node or from record of AnnotationIndex)
+        if(isinstance(parkingSpaceInfo, np.void)):
+            self.setAnnotation(parkingSpaceInfo)
+        else:
+            self.setInfo(parkingSpaceInfo)
 
         # Get cropped and resize image of parking space from parking lot image
+        # Without image (e.g. only layout of parking lot is needed) parking space has no image
         self.imageName = imageName
-        self.setImage(image)
+        self.image = None
+        if(image is not None):
+            self.setImage(image)
+
+
+    '''
+    Pripojí parkovacie miesto k riadku {index} tabuľky {table}, údaje musia byť už v tabuľke uložené
+    '''
+    def attach(self, table, index):
+        for name in ["id", "center", "size", "angle", "occupied", "predictOccupied", "image", "HOGDescriptor"]:
+            self.__dict__.pop(name, None)
+
+        self.table = table
+        self.index = index
+
+
+    '''
+    Vytvorí parkovacie miesto, ktoré je iba pohľadom na riadok {index} tabuľky {table} (bez XML, napr. pre CropShard)
+    '''
+    @classmethod
+    def fromTable(cls, table, index, imageName):
+        parkingSpace = cls.__new__(cls)
+        parkingSpace.imageName = imageName
+        parkingSpace.attach(table, index)
+        return parkingSpace
+
+
+    '''
+    Vráti parametre, ktoré ovplyvňujú hodnotu HOG deskriptora (napr. pre kľúč vo FeatureCache)
+    '''
+    @classmethod
+    def getFeatureParameters(cls):
+        return {"resizeSize": cls.RESIZE_SIZE, "hog": cls.HOG_PARAMETERS}
 
 
     '''
@@ -45,12 +124,31 @@ class ParkingSpace:
             raise Exception("ParkingSpace.setInfo - Nastala chyba")
             
 
+    '''
+    Pre dané parkovacie miesto nastaví údaje zo záznamu AnnotationIndex (XML už bolo prečítané pri indexovaní)
+    '''
+    def setAnnotation(self, annotation):
+        self.occupied = bool(annotation["occupied"])
+        self.id = int(annotation["id"])
+        self.center = tuple(annotation["center"].tolist())
+        self.size = tuple(annotation["size"].tolist())
+        self.angle = int(annotation["angle"])
+
+
     '''
     Pre dané parkovacie miesto na základe údajov, ktoré o mieste má, získa výsek z obrázku parkoviska
     '''
+    @Profiler.profile()
+    def setImage(self, image, resizeSize=RESIZE_SIZE):
+        self.image = self.cropImage(image, self.getPerspectiveTransform(), self.size, resizeSize)
+
+
+    '''
+    Vráti maticu perspektívnej transformácie, ktorá vyrovná obdĺžnik parkovacieho miesta (dá sa vypočítať raz a použiť pre viac obrázkov)
+    '''
     # https://jdhao.github.io/2019/02/23/crop_rotated_rectangle_opencv/
     # https://theailearner.com/tag/cv2-getperspectivetransform/
-    def setImage(self, image, resizeSize=(64,128)):
+    def getPerspectiveTransform(self):
 
         def getDestinationCoordinates(width, height):
             return np.array([[0, height],
@@ -68,7 +166,15 @@ class ParkingSpace:
         destinationCoordinates = getDestinationCoordinates(width, height)
 
         # Get perspective transformation matrix
-        M = cv2.getPerspectiveTransform(sourceCordinates, destinationCoordinates)
+        return cv2.getPerspectiveTransform(sourceCordinates, destinationCoordinates)
+
+
+    '''
+    Vráti výsek parkovacieho miesta s veľkosťou {size} z obrázku parkoviska {image} pomocou transformácie {M}
+    '''
+    @staticmethod
+    def cropImage(image, M, size, resizeSize=RESIZE_SIZE):
+        width, height = size   # Format (width, height)
 
         # Directly warp the rotated rectangle to get the straightened rectangle
         parkingSpaceImage = cv2.warpPerspective(image, M, (width, height))
@@ -77,11 +183,13 @@ class ParkingSpace:
         if(height < width):
             parkingSpaceImage = cv2.rotate(parkingSpaceImage, cv2.ROTATE_90_COUNTERCLOCKWISE)
 
-        # Set image of parking space
-        self.image = cv2.resize(parkingSpaceImage, resizeSize)
+        # Resize image of parking space
+        parkingSpaceImage = cv2.resize(parkingSpaceImage, resizeSize)
 
         # Get image as grayscale (Because HOG compute with grayscale image)
-        self.image = cv2.cvtColor(self.image, cv2.COLOR_RGB2GRAY)
+        if(parkingSpaceImage.ndim == 2):
+            return parkingSpaceImage
+        return cv2.cvtColor(parkingSpaceImage, cv2.COLOR_RGB2GRAY)
 
 
     '''
@@ -92,7 +200,7 @@ class ParkingSpace:
         box = cv2.boxPoints((self.center, self.size, self.angle))
 
         # Get values in array as integers
-        return np.int0(box)
+        return box.astype(np.intp)
 
 
     '''
@@ -126,21 +234,36 @@ class ParkingSpace:
     '''
     Pre dané parkovacie miesto vypočíta HOG deskriptor
     '''
+    @Profiler.profile()
     def getHOGDescriptor(self):
         if(self.HOGDescriptor is None):
-            HOGDescriptor, _ = hog(self.image, orientations=9, pixels_per_cell=(8, 8),
-                        cells_per_block=(2, 2), visualize=True)
-            self.HOGDescriptor = HOGDescriptor
+            self.HOGDescriptor = self.HOG_EXTRACTOR.compute(self.image)[0]
 
         return self.HOGDescriptor
 
 
+    '''
+    Nastaví už vypočítaný HOG deskriptor (napr. načítaný z FeatureCache)
+    '''
+    def setHOGDescriptor(self, HOGDescriptor):
+        self.HOGDescriptor = HOGDescriptor
+
+
+    '''
+    Vráti true/false podľa toho, či má parkovacie miesto už vypočítaný HOG deskriptor
+    '''
+    def hasHOGDescriptor(self):
+        return self.HOGDescriptor is not None
+
+
     '''
     Vráti vizualizáciu HOG deskriptora
     '''
     def getHOGImage(self):
-        _, HOGImage = hog(self.image, orientations=9, pixels_per_cell=(8, 8),
-                    cells_per_block=(2, 2), visualize=True)
+        # skimage and matplotlib are imported only for visualization, so they do not slow down start of inference
+        from skimage.feature import hog
+
+        _, HOGImage = hog(self.image, visualize=True, **self.HOG_PARAMETERS)
 
         return HOGImage
 
@@ -149,6 +272,8 @@ class ParkingSpace:
     Zobrazí obrázok pre parkovacie miesto a aj jeho HOG vizualizáciu
     '''
     def showHOGImage(self):
+        import matplotlib.pyplot as plt
+
         _, (ax1, ax2) = plt.subplots(1, 2, figsize=(8, 4), sharex=True, sharey=True)
 
         ax1.axis('off')
@@ -166,6 +291,8 @@ class ParkingSpace:
     Uloží obrázok pre parkovacie miesto a aj jeho HOG vizualizáciu
     '''
     def saveHOGImage(self, dir="", format="png"):
+        import matplotlib.pyplot as plt
+
         plt.close('all')
         _, (ax1, ax2) = plt.subplots(1, 2, figsize=(8, 4), sharex=True, sharey=True)
 
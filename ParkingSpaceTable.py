@@ -0,0 +1,202 @@
+import numpy as np
+
+from ParkingSpace import ParkingSpace
+
+
+'''
+Trieda ParkingSpaceTable drží všetky parkovacie miesta datasetu v stĺpcovej podobe
+    - spaces: štruktúrované pole (id, index obrázku, stred, veľkosť, uhol, obsadenosť, predikcia)
+    - crops: pole výsekov parkovacích miest (N x 128 x 64, uint8)
+    - descriptors: matica HOG deskriptorov (N x D, float32), počíta sa až keď je potrebná
+Objekty ParkingSpace po pripojení k tabuľke slúžia iba ako pohľad na jeden riadok tabuľky
+'''
+class ParkingSpaceTable:
+
+    SPACE_DTYPE = np.dtype([("id", "i4"), ("image", "i4"), ("center", "i4", (2,)), ("size", "i4", (2,)),
+                            ("angle", "i4"), ("occupied", "?"), ("predicted", "i1")])
+
+    # Value of column predicted, when parking space was not classified yet
+    NO_PREDICTION = -1
+
+    def __init__(self, images, HOGExtractor=None):
+        # Extractor used for computing missing HOG descriptors (default is the one used by ParkingSpace)
+        self.HOGExtractor = ParkingSpace.HOG_EXTRACTOR if HOGExtractor is None else HOGExtractor
+        self.imageNames = [image.getImageName() for image in images]
+
+        self.parkingSpaces = []
+        imageIndexes = []
+        for imageIndex, image in enumerate(images):
+            self.parkingSpaces.extend(image.getParkingSpaces())
+            imageIndexes.extend([imageIndex] * len(image.getParkingSpaces()))
+
+        width, height = ParkingSpace.RESIZE_SIZE
+        self.spaces = np.empty(len(self.parkingSpaces), dtype=self.SPACE_DTYPE)
+        self.crops = np.empty((len(self.parkingSpaces), height, width), dtype=np.uint8)
+        self.descriptors = None
+        self.hasDescriptor = np.zeros(len(self.parkingSpaces), dtype=bool)
+
+        # Move data from objects to table, objects become only views to the table
+        for index, parkingSpace in enumerate(self.parkingSpaces):
+            predicted = parkingSpace.isOccupiedByPrediction()
+            self.spaces[index] = (parkingSpace.id, imageIndexes[index], parkingSpace.center, parkingSpace.size,
+                                  parkingSpace.angle, parkingSpace.isOccupied(),
+                                  self.NO_PREDICTION if predicted is None else predicted)
+            self.crops[index] = parkingSpace.image
+            if(parkingSpace.hasHOGDescriptor()):
+                self.setDescriptors([index], [parkingSpace.getHOGDescriptor()])
+
+            parkingSpace.attach(self, index)
+
+
+    '''
+    Vytvorí tabuľku priamo z polí (napr. namapovaných z CropShard), výseky {crops} sa nekopírujú
+        - {spaces} musí mať stĺpce id, image, center, size, angle, occupied, predikcie sa nastavia na NO_PREDICTION
+        - Objekty ParkingSpace sa vytvoria až pri prvom volaní getParkingSpaces
+    '''
+    @classmethod
+    def fromArrays(cls, spaces, crops, imageNames, HOGExtractor=None):
+        table = cls.__new__(cls)
+        table.HOGExtractor = ParkingSpace.HOG_EXTRACTOR if HOGExtractor is None else HOGExtractor
+        table.imageNames = list(imageNames)
+        table.parkingSpaces = None
+
+        table.spaces = np.empty(len(spaces), dtype=cls.SPACE_DTYPE)
+        for column in ["id", "image", "center", "size", "angle", "occupied"]:
+            table.spaces[column] = spaces[column]
+        table.spaces["predicted"] = cls.NO_PREDICTION
+
+        table.crops = crops
+        table.descriptors = None
+        table.hasDescriptor = np.zeros(len(spaces), dtype=bool)
+        return table
+
+
+    '''
+    Vráti objekty ParkingSpace pre všetky riadky tabuľky (ak tabuľka vznikla z polí, vytvorí ich ako pohľady na riadky)
+    '''
+    def getParkingSpaces(self):
+        if(self.parkingSpaces is None):
+            imageIndexes = self.spaces["image"].tolist()
+            self.parkingSpaces = [ParkingSpace.fromTable(self, index, self.imageNames[imageIndex]) for index, imageIndex in enumerate(imageIndexes)]
+
+        return self.parkingSpaces
+
+
+    def __len__(self):
+        return len(self.spaces)
+
+
+    '''
+    Vráti hodnotu zo stĺpca {column} pre parkovacie miesto na riadku {index} (používa ParkingSpace)
+    '''
+    def getValue(self, column, index):
+        if(column == "image"):
+            return self.crops[index]
+        if(column == "HOGDescriptor"):
+            return self.descriptors[index] if self.hasDescriptor[index] else None
+        if(column == "predictOccupied"):
+            predicted = self.spaces["predicted"][index]
+            return None if predicted == self.NO_PREDICTION else int(predicted)
+        if(column in ["center", "size"]):
+            return tuple(self.spaces[column][index].tolist())
+        if(column == "occupied"):
+            return bool(self.spaces[column][index])
+
+        return int(self.spaces[column][index])
+
+
+    '''
+    Nastaví hodnotu v stĺpci {column} pre parkovacie miesto na riadku {index} (používa ParkingSpace)
+    '''
+    def setValue(self, column, index, value):
+        if(column == "image"):
+            self.crops[index] = value
+        elif(column == "HOGDescriptor"):
+            if(value is None):
+                self.hasDescriptor[index] = False
+            else:
+                self.setDescriptors([index], [value])
+        elif(column == "predictOccupied"):
+            self.spaces["predicted"][index] = self.NO_PREDICTION if value is None else value
+        else:
+            self.spaces[column][index] = value
+
+
+    '''
+    Nastaví HOG deskriptory parkovacím miestam na riadkoch {indexes}
+    '''
+    def setDescriptors(self, indexes, descriptors):
+        descriptors = np.asarray(descriptors, dtype=np.float32)
+        if(self.descriptors is None):
+            self.descriptors = np.zeros((len(self), descriptors.shape[1]), dtype=np.float32)
+
+        self.descriptors[indexes] = descriptors
+        self.hasDescriptor[indexes] = True
+
+
+    '''
+    Nastaví celú maticu HOG deskriptorov naraz (napr. namapovanú z FeatureCache)
+    '''
+    def setDescriptorMatrix(self, descriptors):
+        if(len(descriptors) != len(self)):
+            raise Exception("ParkingSpaceTable.setDescriptorMatrix - Zlý počet deskriptorov")
+
+        self.descriptors = descriptors
+        self.hasDescriptor[:] = True
+
+
+    '''
+    Vypočíta HOG deskriptory pre parkovacie miesta, ktoré ich ešte nemajú (všetky naraz cez HOGExtractor)
+    '''
+    def computeDescriptors(self):
+        missing = np.flatnonzero(~self.hasDescriptor)
+        if(len(missing)):
+            self.setDescriptors(missing, self.HOGExtractor.compute(self.crops[missing]))
+
+
+    '''
+    Vráti maticu HOG deskriptorov všetkých parkovacích miest (chýbajúce najprv dopočíta)
+    '''
+    def getDescriptors(self):
+        self.computeDescriptors()
+        if(self.descriptors is None):
+            return np.empty((0, 0), dtype=np.float32)
+
+        return self.descriptors
+
+
+    '''
+    Vráti obsadenosť všetkých parkovacích miest (načítanú z XML) ako pole int8
+    '''
+    def getLabels(self):
+        return self.spaces["occupied"].astype(np.int8)
+
+
+    '''
+    Nastaví predikcie všetkým parkovacím miestam naraz
+    '''
+    def setPredictions(self, predictions):
+        self.spaces["predicted"] = np.asarray(predictions, dtype=np.int8)
+
+
+    '''
+    Vráti masku parkovacích miest, pre ktoré klasifikátor spravil zlú klasifikáciu
+    '''
+    def getWrongPredictions(self):
+        return self.spaces["predicted"] != self.spaces["occupied"]
+
+
+    '''
+    Vráti počet zle klasifikovaných parkovacích miest pre každý obrázok
+    '''
+    def getWrongPredictionsPerImage(self):
+        return np.bincount(self.spaces["image"][self.getWrongPredictions()], minlength=len(self.imageNames))
+
+
+    '''
+    Vráti štatistiku (celkovo, obsadených, neobsadených)
+    '''
+    def getStatistics(self):
+        total = len(self)
+        occupied = int(np.count_nonzero(self.spaces["occupied"]))
+        return (total, occupied, total - occupied)
@@ -0,0 +1,182 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+
+'''
+Trieda Profiler meria čas a pamäť jednotlivých krokov spracovania (Dataset.loadImages, Image.loadParkingSpaces, HOG, klasifikátory, ...)
+    - Je vypnutý, kým sa nezavolá Profiler.enable() (alebo nie je nastavená premenná prostredia PROFILER=1)
+    - Vypnutý stojí iba jednu kontrolu atribútu na volanie (stage vráti prázdny context manager, profile volá priamo funkciu)
+    - Pre každý krok zbiera počet volaní, celkový čas a (pri traceMemory=True) zmenu alokovanej pamäte cez tracemalloc
+    - Výsledky sa dajú vypísať ako tabuľka (printSummary) alebo uložiť ako Chrome trace JSON (saveTrace, otvorí sa v chrome://tracing alebo Perfetto)
+    - Meria iba aktuálny proces (kroky v procesoch ProcessPoolExecutor sa nezapočítajú)
+'''
+class Profiler:
+
+    enabled = os.environ.get("PROFILER") == "1"
+    traceMemory = False
+    trace = False
+
+    # name -> [number of calls, total seconds, allocated bytes]
+    stages = {}
+    events = []
+    startTime = time.perf_counter()
+    lock = threading.Lock()
+
+    EMPTY_CONTEXT = nullcontext()
+
+    '''
+    Zapne meranie (traceMemory = meranie pamäte cez tracemalloc, trace = ukladanie udalostí pre Chrome trace)
+    '''
+    @classmethod
+    def enable(cls, traceMemory=False, trace=False):
+        cls.traceMemory = traceMemory
+        cls.trace = trace
+        if(traceMemory and not tracemalloc.is_tracing()):
+            tracemalloc.start()
+
+        cls.enabled = True
+
+
+    '''
+    Vypne meranie (namerané hodnoty zostanú)
+    '''
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+        if(cls.traceMemory and tracemalloc.is_tracing()):
+            tracemalloc.stop()
+
+
+    '''
+    Zmaže všetky namerané hodnoty
+    '''
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.stages = {}
+            cls.events = []
+            cls.startTime = time.perf_counter()
+
+
+    '''
+    Context manager, ktorý zmeria blok kódu ako krok {name}
+    '''
+    @classmethod
+    def stage(cls, name):
+        if(not cls.enabled):
+            return cls.EMPTY_CONTEXT
+
+        return Stage(name)
+
+
+    '''
+    Dekorátor, ktorý zmeria každé volanie funkcie ako krok {name} (predvolene meno funkcie, napr. Image.loadParkingSpaces)
+    '''
+    @classmethod
+    def profile(cls, name=None):
+        def decorator(function):
+            stageName = function.__qualname__ if name is None else name
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if(not cls.enabled):
+                    return function(*args, **kwargs)
+
+                with Stage(stageName):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+    '''
+    Pripočíta jedno volanie kroku {name} (používa Stage)
+    '''
+    @classmethod
+    def record(cls, name, startTime, duration, allocated):
+        with cls.lock:
+            stage = cls.stages.setdefault(name, [0, 0.0, 0])
+            stage[0] += 1
+            stage[1] += duration
+            stage[2] += allocated
+
+            if(cls.trace):
+                cls.events.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": round((startTime - cls.startTime) * 1e6, 3),
+                    "dur": round(duration * 1e6, 3),
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": {"allocatedBytes": allocated} if cls.traceMemory else {}
+                })
+
+
+    '''
+    Vráti namerané hodnoty ako slovník meno kroku -> {count, totalSeconds, meanMs, allocatedBytes}
+    '''
+    @classmethod
+    def getSummary(cls):
+        with cls.lock:
+            return {name: {
+                "count": count,
+                "totalSeconds": round(totalTime, 6),
+                "meanMs": round(totalTime / count * 1000, 4),
+                "allocatedBytes": allocated if cls.traceMemory else None
+            } for name, (count, totalTime, allocated) in cls.stages.items()}
+
+
+    '''
+    Vypíše tabuľku krokov zoradenú podľa celkového času
+        - Časy vnorených krokov sú započítané aj v nadradených krokoch
+    '''
+    @classmethod
+    def printSummary(cls):
+        summary = cls.getSummary()
+        print("{:<40} {:>10} {:>12} {:>12} {:>14}".format("Krok", "Volania", "Celkovo [s]", "Priemer [ms]", "Pamat [MB]"))
+        for name, stage in sorted(summary.items(), key=lambda item: -item[1]["totalSeconds"]):
+            memory = "-" if stage["allocatedBytes"] is None else "{:.2f}".format(stage["allocatedBytes"] / (1024 * 1024))
+            print("{:<40} {:>10} {:>12.3f} {:>12.3f} {:>14}".format(name, stage["count"], stage["totalSeconds"], stage["meanMs"], memory))
+
+
+    '''
+    Uloží zaznamenané udalosti do {fileName} vo formáte Chrome trace (iba ak bol Profiler zapnutý s trace=True)
+    '''
+    @classmethod
+    def saveTrace(cls, fileName):
+        with cls.lock:
+            events = list(cls.events)
+
+        with open(fileName, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+
+'''
+Meranie jedného volania kroku (vytvára ho Profiler.stage a Profiler.profile)
+'''
+class Stage:
+
+    __slots__ = ["name", "startTime", "startMemory"]
+
+    def __init__(self, name):
+        self.name = name
+
+
+    def __enter__(self):
+        self.startMemory = tracemalloc.get_traced_memory()[0] if Profiler.traceMemory else 0
+        self.startTime = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exception):
+        duration = time.perf_counter() - self.startTime
+        allocated = tracemalloc.get_traced_memory()[0] - self.startMemory if Profiler.traceMemory else 0
+        Profiler.record(self.name, self.startTime, duration, allocated)
+        return False
@@ -0,0 +1,136 @@
+import hashlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+'''
+Trieda Renderer skladá obrázky výsledkov klasifikácie (výsek parkovacieho miesta + HOG vizualizácia) iba cez OpenCV a NumPy
+    - Nahrádza matplotlib pri ukladaní najhoršieho obrázku (ParkingSpace.saveHOGImage vytváral pre každé miesto nový graf)
+    - HOG vizualizácie sa počítajú dávkovo (HOGExtractor.visualize) a pamätajú sa podľa obsahu výseku (najviac {cacheSize})
+    - Súbory sa zapisujú vo vláknach {workers} na pozadí, naraz čaká na zápis najviac {maxPending} obrázkov (wait počká na všetky)
+'''
+class Renderer:
+
+    SCALE = 2
+    MARGIN = 4
+    BACKGROUND = 255
+    # Colors of tile border in contact sheet (BGR, same as in Image)
+    GREEN = (0, 255, 0)
+    RED = (0, 0, 255)
+
+    def __init__(self, HOGExtractor, workers=2, cacheSize=4096, maxPending=64):
+        self.HOGExtractor = HOGExtractor
+        self.cacheSize = cacheSize
+        self.maxPending = maxPending
+
+        self.cache = OrderedDict()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = deque()
+
+
+    '''
+    Vráti HOG vizualizácie (uint8, 0 - 255) pre výseky {crops}, vypočítajú sa iba tie, ktoré ešte nie sú v cache
+    '''
+    def getHOGImages(self, crops):
+        keys = [hashlib.blake2b(np.ascontiguousarray(crop).tobytes(), digest_size=16).digest() for crop in crops]
+
+        missing = [index for index, key in enumerate(keys) if key not in self.cache]
+        if(missing):
+            visualizations = self.HOGExtractor.visualize(np.asarray([crops[index] for index in missing]))
+            # Scaled to full range of each image (as imshow did)
+            maximum = visualizations.max(axis=(1, 2), keepdims=True)
+            visualizations = np.divide(visualizations * 255, maximum, out=np.zeros_like(visualizations), where=maximum > 0)
+            for index, visualization in zip(missing, visualizations.astype(np.uint8)):
+                self.cache[keys[index]] = visualization
+
+        HOGImages = []
+        for key in keys:
+            self.cache.move_to_end(key)
+            HOGImages.append(self.cache[key])
+
+        while(len(self.cache) > self.cacheSize):
+            self.cache.popitem(last=False)
+
+        return HOGImages
+
+
+    '''
+    Vráti obrázok parkovacieho miesta: výsek a vedľa neho HOG vizualizácia (zväčšené {SCALE}-krát)
+    '''
+    def renderParkingSpace(self, crop, HOGImage):
+        height, width = crop.shape
+        panel = np.full((height, 2 * width + self.MARGIN), self.BACKGROUND, dtype=np.uint8)
+        panel[:, :width] = crop
+        panel[:, width + self.MARGIN:] = HOGImage
+
+        return cv2.resize(panel, None, fx=self.SCALE, fy=self.SCALE, interpolation=cv2.INTER_NEAREST)
+
+
+    '''
+    Vráti jeden obrázok (contact sheet) so všetkými parkovacími miestami {parkingSpaces} v mriežke s {columns} stĺpcami
+        - Okraj dlaždice je farba predikcie (červená = obsadené, zelená = voľné), v rohu je id parkovacieho miesta
+    '''
+    def renderContactSheet(self, parkingSpaces, columns=4):
+        crops = [parkingSpace.image for parkingSpace in parkingSpaces]
+        tiles = []
+        for parkingSpace, crop, HOGImage in zip(parkingSpaces, crops, self.getHOGImages(crops)):
+            tile = cv2.cvtColor(self.renderParkingSpace(crop, HOGImage), cv2.COLOR_GRAY2BGR)
+            color = self.RED if parkingSpace.isOccupiedByPrediction() else self.GREEN
+            tile = cv2.copyMakeBorder(tile, self.MARGIN, self.MARGIN, self.MARGIN, self.MARGIN, cv2.BORDER_CONSTANT, value=color)
+            cv2.putText(tile, str(parkingSpace.id), (2 * self.MARGIN, 6 * self.MARGIN), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            tiles.append(tile)
+
+        if(not tiles):
+            return None
+
+        # Last row is filled with empty tiles
+        columns = min(columns, len(tiles))
+        tiles += [np.full_like(tiles[0], self.BACKGROUND)] * (-len(tiles) % columns)
+        rows = [np.hstack(tiles[start:start + columns]) for start in range(0, len(tiles), columns)]
+        return np.vstack(rows)
+
+
+    '''
+    Uloží obrázky parkovacích miest {parkingSpaces} (výsek + HOG) do {dir} priečinka vo formáte {format}
+        - {contactSheet} = False: jeden súbor pre každé miesto (meno parkovacieho miesta), True: jeden súbor {name} pre všetky
+    '''
+    def saveParkingSpaces(self, parkingSpaces, dir="", format="png", contactSheet=False, name="parkingSpaces"):
+        if(contactSheet):
+            sheet = self.renderContactSheet(parkingSpaces)
+            if(sheet is not None):
+                self.write(f"{dir}/{name}.{format}", sheet)
+            return
+
+        crops = [parkingSpace.image for parkingSpace in parkingSpaces]
+        for parkingSpace, crop, HOGImage in zip(parkingSpaces, crops, self.getHOGImages(crops)):
+            self.write(f"{dir}/{parkingSpace.getParkingSpaceName()}.{format}", self.renderParkingSpace(crop, HOGImage))
+
+
+    '''
+    Zapíše obrázok {image} do súboru {fileName} vo vlákne na pozadí (obrázok sa potom už nesmie meniť)
+    '''
+    def write(self, fileName, image):
+        while(len(self.pending) >= self.maxPending):
+            self.pending.popleft().result()
+
+        self.pending.append(self.executor.submit(self.writeFile, fileName, image))
+
+
+    '''
+    Zapíše obrázok {image} do súboru {fileName} (beží vo vlákne)
+    '''
+    @staticmethod
+    def writeFile(fileName, image):
+        if(not cv2.imwrite(fileName, image)):
+            raise Exception(f"Renderer.writeFile - Obrázok {fileName} sa nepodarilo uložiť")
+
+
+    '''
+    Počká, kým sa zapíšu všetky obrázky (chyba zápisu sa vyhodí tu)
+    '''
+    def wait(self):
+        while(self.pending):
+            self.pending.popleft().result()
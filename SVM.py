@@ -1,35 +1,163 @@
 
-from sklearn import svm
 import numpy as np
-from sklearn import metrics
+import time
+from ModelArtifact import saveModel, loadModel
+from Profiler import Profiler
 
 '''
 Wrapper pre implementáciu SVM v sklearn
+    - mode určuje implementáciu:
+        - "exact": svm.SVC s daným jadrom (čas trénovania rastie zhruba kvadraticky s počtom vzoriek)
+        - "liblinear": LinearSVC, iba pre lineárne jadro, rýchlejšie trénovanie na všetkých dátach naraz
+        - "sgd": SGDClassifier s hinge loss, iba pre lineárne jadro, trénuje sa po blokoch cez partial_fit (pamäť nezávisí od veľkosti datasetu)
+        - "nystroem": aproximácia jadra (rbf, poly, sigmoid) cez Nystroem s {numberOfComponents} komponentmi a potom LinearSVC
+        - "rff": aproximácia rbf jadra náhodnými Fourierovými príznakmi (RBFSampler) s {numberOfComponents} komponentmi a potom LinearSVC
+    - Pri aproximácii má jadro rovnaké parametre ako v SVC (gamma="scale", pri poly degree=3 a coef0=0)
+    - sklearn sa importuje až pri vytvorení modelu (iba potrebné moduly), samotný import SVM je rýchly
 '''
 class SVM:
 
-    def __init__(self, kernelType):
-        self.svm = svm.SVC(kernel=kernelType) # Linear Kernel
+    MODES = ["exact", "liblinear", "sgd", "nystroem", "rff"]
+    APPROXIMATION_MODES = ["nystroem", "rff"]
+
+    def __init__(self, kernelType, mode="exact", chunkSize=4096, epochs=5, numberOfComponents=500):
+        if(mode not in self.MODES):
+            raise Exception(f"SVM - Neznámy mód {mode}")
+        if(mode in ["liblinear", "sgd"] and kernelType != "linear"):
+            raise Exception(f"SVM - Mód {mode} podporuje iba lineárne jadro")
+        if(mode == "nystroem" and kernelType not in ["rbf", "poly", "sigmoid"]):
+            raise Exception(f"SVM - Mód {mode} podporuje iba jadrá rbf, poly a sigmoid")
+        if(mode == "rff" and kernelType != "rbf"):
+            raise Exception(f"SVM - Mód {mode} podporuje iba rbf jadro")
+
+        self.kernelType = kernelType
+        self.mode = mode
+
+        # Explicit feature map of kernel approximation (created in fit, because gamma depends on data)
+        self.numberOfComponents = numberOfComponents
+        self.featureMap = None
+
+        # Size of one block of data and number of passes through data for SGD
+        self.chunkSize = chunkSize
+        self.epochs = epochs
+
+        # Speed of last training (samples per second)
+        self.trainingSpeed = None
+
+        if(mode in ["liblinear", *self.APPROXIMATION_MODES]):
+            from sklearn.svm import LinearSVC
+            self.svm = LinearSVC()
+        elif(mode == "sgd"):
+            from sklearn.linear_model import SGDClassifier
+            self.svm = SGDClassifier(loss="hinge")
+        else:
+            from sklearn.svm import SVC
+            self.svm = SVC(kernel=kernelType) # Linear Kernel
 
 
     '''
     Trénovanie na dátach z daného datasetu
+        - V móde "sgd" sa dáta z datasetu čítajú po blokoch s {chunkSize} riadkami cez Dataset.iterBatches
+          (pri lazy datasete sa obrázky načítavajú postupne v každej epoche, preto sa oplatí zapnúť FeatureCache)
     '''
+    @Profiler.profile()
     def train(self, dataset):
+        if(self.mode == "sgd"):
+            self.trainOnBatches(lambda: ((trainingData, labels) for trainingData, labels, _ in dataset.iterBatches(self.chunkSize)))
+            return
+
         # Get training data and labels
         trainingData, labels = dataset.getTrainingData()
 
         # Train
+        self.fit(trainingData, labels)
+
+
+    '''
+    Inkrementálne trénovanie (mód "sgd") na blokoch dát
+        - {getBatches} je funkcia, ktorá pri každom zavolaní vráti nový iterátor blokov (<matica dát>, <triedy>), volá sa raz pre každú epochu
+        - Vypíše a uloží rýchlosť trénovania (vzorky za sekundu)
+    '''
+    @Profiler.profile()
+    def trainOnBatches(self, getBatches):
+        if(self.mode != "sgd"):
+            raise Exception("SVM.trainOnBatches - Inkrementálne trénovanie podporuje iba mód sgd")
+
+        random = np.random.default_rng(0)
+        numberOfSamples = 0
+        startTime = time.time()
+        for _ in range(self.epochs):
+            for trainingData, labels in getBatches():
+                # Shuffle samples in block, because data in dataset are ordered by images
+                order = random.permutation(len(labels))
+                trainingData = np.asarray(trainingData, dtype=np.float32)[order]
+                labels = np.asarray(labels)[order]
+
+                self.svm.partial_fit(trainingData, labels, classes=[0, 1])
+                numberOfSamples += len(labels)
+
+        self.trainingSpeed = numberOfSamples / max(time.time() - startTime, 1e-9)
+        print("     - Trening: {:.0f} vzoriek/s".format(self.trainingSpeed))
+
+
+    '''
+    Trénovanie priamo na matici dát {trainingData} a ich triedach {labels} (bez datasetu)
+    '''
+    @Profiler.profile()
+    def fit(self, trainingData, labels):
+        startTime = time.time()
+        if(self.mode in self.APPROXIMATION_MODES):
+            trainingData = np.ascontiguousarray(trainingData, dtype=np.float32)
+            self.fitFeatureMap(trainingData)
+            trainingData = self.featureMap.transform(trainingData)
+
         self.svm.fit(trainingData, labels)
+        self.trainingSpeed = len(labels) / max(time.time() - startTime, 1e-9)
+
+
+    '''
+    Vytvorí a nafituje explicitnú mapu príznakov, ktorá aproximuje jadro (Nystroem alebo RBFSampler)
+    '''
+    def fitFeatureMap(self, trainingData):
+        # Same as gamma="scale" in SVC
+        variance = float(trainingData.var())
+        gamma = 1.0 / (trainingData.shape[1] * variance) if variance > 0 else 1.0
+
+        numberOfComponents = min(self.numberOfComponents, len(trainingData))
+        if(self.mode == "rff"):
+            from sklearn.kernel_approximation import RBFSampler
+            self.featureMap = RBFSampler(gamma=gamma, n_components=numberOfComponents, random_state=0)
+        else:
+            # degree and coef0 are used only by kernels, which have them (same defaults as SVC)
+            from sklearn.kernel_approximation import Nystroem
+            self.featureMap = Nystroem(kernel=self.kernelType, gamma=gamma, degree=3, coef0=0, n_components=numberOfComponents, random_state=0)
+
+        self.featureMap.fit(trainingData)
 
 
     '''
     Klasifikácia dát z daného datasetu
+        - Všetky deskriptory klasifikuje naraz ako jednu maticu (ak je zadaný {chunkSize}, tak po blokoch s najviac {chunkSize} riadkami, aby sa obmedzila pamäť)
+        - Vráti pole predikcií typu int8
     '''
-    def makePrediction(self, testData):
-        predictions = []
-        for parkingSpaceHOGDescriptor in testData:
-            predictions.append(self.svm.predict([parkingSpaceHOGDescriptor])[0])
+    @Profiler.profile()
+    def makePrediction(self, testData, chunkSize=None):
+        # One contiguous matrix, so sklearn validates the input only once per chunk
+        # Data type is kept (SVC and LinearSVC would convert float32 back to float64), only feature map was fitted on float32
+        testData = np.ascontiguousarray(testData, dtype=np.float32 if self.featureMap is not None else None)
+        predictions = np.empty(len(testData), dtype=np.int8)
+        if(len(testData) == 0):
+            return predictions
+
+        if(chunkSize is None):
+            chunkSize = len(testData)
+
+        for start in range(0, len(testData), chunkSize):
+            end = start + chunkSize
+            chunk = testData[start:end]
+            if(self.featureMap is not None):
+                chunk = self.featureMap.transform(chunk)
+            predictions[start:end] = self.svm.predict(chunk)
 
         return predictions
 
@@ -37,11 +165,75 @@ class SVM:
     '''
     Spraví klasifikáciu, tú nastaví parkovacím miestam v datasete a vypíše úspešnosť klasifikácie
     '''
-    def predictAndSetPredictions(self, dataset):
+    def predictAndSetPredictions(self, dataset, chunkSize=None):
         testData, actualOccupancy = dataset.getTrainingData()
 
-        predictOccupancy = self.makePrediction(testData)
+        predictOccupancy = self.makePrediction(testData, chunkSize)
         dataset.setPredictions(predictOccupancy)
 
         # Model Accuracy: how often is the classifier correct?
+        from sklearn import metrics
         print("     - Uspesnost: ", metrics.accuracy_score(actualOccupancy, predictOccupancy))
+
+
+    '''
+    Klasifikácia datasetu po blokoch (Dataset.iterBatches), celý dataset nikdy nie je v pamäti naraz
+        - {onBatch}(predikcie, space_refs) sa volá po každom bloku (napr. pre uloženie predikcií), vypíše a vráti úspešnosť
+    '''
+    def predictOnBatches(self, dataset, batchSize=4096, onBatch=None):
+        correct = 0
+        total = 0
+        for testData, actualOccupancy, spaceRefs in dataset.iterBatches(batchSize):
+            predictOccupancy = self.makePrediction(testData)
+            correct += int(np.count_nonzero(predictOccupancy == actualOccupancy))
+            total += len(actualOccupancy)
+
+            if(onBatch is not None):
+                onBatch(predictOccupancy, spaceRefs)
+
+        accuracy = correct / total if total else 0.0
+        print("     - Uspesnost: ", accuracy)
+        return accuracy
+
+
+    '''
+    Porovná tento model s presným SVC s rovnakým jadrom na rovnakých dátach, vypíše a vráti úspešnosť a časy oboch
+        - Natrénuje oba modely na {trainingDataset} a vyhodnotí ich na {testingDataset}
+    '''
+    def approximationReport(self, trainingDataset, testingDataset):
+        trainingData, trainingLabels = trainingDataset.getTrainingData()
+        testingData, testingLabels = testingDataset.getTrainingData()
+
+        from sklearn import metrics
+
+        report = {}
+        for name, model in [(self.mode, self), ("exact", SVM(self.kernelType))]:
+            startTime = time.time()
+            model.fit(trainingData, trainingLabels)
+            trainTime = time.time() - startTime
+
+            startTime = time.time()
+            predictions = model.makePrediction(testingData)
+            predictTime = time.time() - startTime
+
+            report[name] = {"accuracy": metrics.accuracy_score(testingLabels, predictions), "trainTime": trainTime, "predictTime": predictTime}
+            print(f"     - {self.kernelType} {name}: Uspesnost {report[name]['accuracy']:.4f}, trening za {trainTime:.2f} sekund/y, predikcia za {predictTime:.2f} sekund/y")
+
+        return report
+
+
+    '''
+    Uloží natrénovaný model do súboru {fileName} (aj s PCA a počtom jeho komponentov, ak sa pred klasifikáciou používa)
+        - {reduction} = zmenšenie obrázkov pri dekódovaní trénovacieho datasetu (Dataset.frameDecoder.reduction)
+    '''
+    def save(self, fileName, pca=None, numberOfComponents=None, reduction=1):
+        saveModel(fileName, self, pca, numberOfComponents, reduction)
+
+
+    '''
+    Načíta model uložený cez save (odmietne ho, ak bol natrénovaný s inou konfiguráciou príznakov)
+    '''
+    @classmethod
+    def load(cls, fileName):
+        model, _, _ = loadModel(fileName, cls.__name__)
+        return model
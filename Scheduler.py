@@ -0,0 +1,289 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from FrameDecoder import FrameDecoder
+from Layout import Layout
+from ModelArtifact import loadModel
+from ParkingSpace import ParkingSpace
+
+
+'''
+Zdroj obrázkov jednej kamery z priečinka (na testovanie, namiesto skutočnej kamery)
+    - Vracia (meno obrázku, bajty JPG súboru) pre všetky JPG obrázky v priečinku {path} zoradené podľa mena
+    - {interval} = pauza medzi obrázkami v sekundách (0 = čo najrýchlejšie), {repeat} = koľkokrát sa priečinok prejde
+'''
+class FileFrameSource:
+
+    def __init__(self, cameraId, path, interval=0.0, repeat=1):
+        self.cameraId = cameraId
+        self.path = path
+        self.interval = interval
+        self.repeat = repeat
+
+
+    async def frames(self):
+        fileNames = sorted(fileName for fileName in os.listdir(self.path) if fileName.endswith(".jpg"))
+        for _ in range(self.repeat):
+            for fileName in fileNames:
+                with open(f"{self.path}/{fileName}", "rb") as file:
+                    data = file.read()
+                yield (os.path.splitext(fileName)[0], data)
+
+                await asyncio.sleep(self.interval)
+
+
+
+'''
+Trieda Scheduler prijíma obrázky z viacerých kamier naraz (asyncio) a klasifikuje ich spoločne
+    - Dekódovanie a výseky parkovacích miest (FrameDecoder, Layout) bežia vo vláknach {workers}, aby neblokovali event loop
+    - Výseky z obrázkov rôznych kamier sa spájajú do dávok, pre celú dávku sa naraz vypočíta HOG a zavolá klasifikátor
+    - Dávka sa spracuje, keď má {maxBatchSize} výsekov, alebo keď od prvého obrázku v dávke uplynulo {maxWait} sekúnd
+    - getStatistics vráti hĺbku fronty, veľkosti dávok a latenciu obrázkov (pre nastavenie pomeru priepustnosť / latencia)
+    - Obrázky kamier sa dekódujú {reduction}-krát zmenšené (rovnako, ako pri trénovaní modelu), spúšťa sa cez cli.py serve --camera
+'''
+class Scheduler:
+
+    def __init__(self, classifier, pca=None, numberOfComponents=None, maxBatchSize=1024, maxWait=0.02, workers=4, reduction=1):
+        self.classifier = classifier
+        self.pca = pca
+        self.numberOfComponents = numberOfComponents
+        self.maxBatchSize = maxBatchSize
+        self.maxWait = maxWait
+        self.reduction = reduction
+
+        self.cameras = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Classification runs in its own thread, so batches are classified one after another
+        self.classifierExecutor = ThreadPoolExecutor(max_workers=1)
+
+        self.queue = None
+        self.batchTask = None
+        self.pending = None
+
+        # Statistics
+        self.batchSizes = []
+        self.latencies = []
+        self.maxQueueDepth = 0
+
+
+    '''
+    Vytvorí scheduler zo súboru s modelom (SVM.save/KNN.save, model aj s PCA)
+        - Model musí byť natrénovaný na obrázkoch so zmenšením {reduction}
+    '''
+    @classmethod
+    def fromFile(cls, modelFileName, reduction=1, **parameters):
+        classifier, pca, numberOfComponents = loadModel(modelFileName, reduction=reduction)
+        return cls(classifier, pca, numberOfComponents, reduction=reduction, **parameters)
+
+
+    '''
+    Pridá kameru {cameraId} s rozložením parkoviska {layout} (obrázky sa dekódujú {reduction}-krát zmenšené, None = zmenšenie schedulera)
+    '''
+    def addCamera(self, cameraId, layout, reduction=None):
+        if(reduction is None):
+            reduction = self.reduction
+        if(reduction != self.reduction):
+            raise Exception(f"Scheduler - Kamera {cameraId} má iné zmenšenie ({reduction}) ako model ({self.reduction})")
+
+        self.cameras[cameraId] = (layout, FrameDecoder(reduction))
+
+
+    '''
+    Spustí spracovanie dávok (musí bežať v event loope)
+    '''
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.batchTask = asyncio.create_task(self.batchLoop())
+
+
+    '''
+    Zastaví spracovanie dávok a vlákna
+    '''
+    async def stop(self):
+        if(self.batchTask is not None):
+            self.batchTask.cancel()
+            try:
+                await self.batchTask
+            except asyncio.CancelledError:
+                pass
+            self.batchTask = None
+
+        self.executor.shutdown()
+        self.classifierExecutor.shutdown()
+
+
+    '''
+    Dekóduje obrázok kamery {cameraId} z bajtov JPG súboru {data} a vráti výseky parkovacích miest (beží vo vlákne)
+    '''
+    def prepareFrame(self, cameraId, data):
+        layout, frameDecoder = self.cameras[cameraId]
+        frame = frameDecoder.decodeBuffer(data)
+        if(frame is None):
+            raise Exception("Scheduler - Obrázok sa nepodarilo dekódovať")
+
+        return layout.extractCrops(frame, frameDecoder.reduction)
+
+
+    '''
+    Klasifikuje obrázok z kamery {cameraId} (bajty JPG súboru {data}), vráti obsadenosť parkovacích miest a latenciu
+    '''
+    async def submitFrame(self, cameraId, data):
+        if(cameraId not in self.cameras):
+            raise Exception(f"Scheduler - Neznáma kamera {cameraId}")
+
+        startTime = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        crops = await loop.run_in_executor(self.executor, self.prepareFrame, cameraId, data)
+        prepareTime = time.perf_counter() - startTime
+
+        future = loop.create_future()
+        await self.queue.put((cameraId, crops, future))
+        self.maxQueueDepth = max(self.maxQueueDepth, self.queue.qsize())
+        spaces, predictions, batchSize = await future
+
+        latency = time.perf_counter() - startTime
+        self.latencies.append(latency)
+        return {
+            "camera": cameraId,
+            "spaces": {int(id): int(prediction) for id, prediction in zip(spaces, predictions)},
+            "occupied": int(np.count_nonzero(predictions)),
+            "batchSize": batchSize,
+            "latencyMs": {"prepare": round(prepareTime * 1000, 2), "total": round(latency * 1000, 2)}
+        }
+
+
+    '''
+    Postupne skladá dávky z fronty a klasifikuje ich
+        - Obrázok sa nedelí medzi dávky, dávka má najviac {maxBatchSize} výsekov (iba obrázok s viac miestami ide sám)
+    '''
+    async def batchLoop(self):
+        loop = asyncio.get_running_loop()
+        while(True):
+            if(self.pending is not None):
+                item, self.pending = self.pending, None
+            else:
+                item = await self.queue.get()
+
+            batch = [item]
+            batchSize = len(item[1])
+            deadline = loop.time() + self.maxWait
+            while(batchSize < self.maxBatchSize):
+                timeout = deadline - loop.time()
+                if(timeout <= 0):
+                    break
+
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                if(batchSize + len(item[1]) > self.maxBatchSize):
+                    self.pending = item
+                    break
+
+                batch.append(item)
+                batchSize += len(item[1])
+
+            await self.processBatch(batch)
+
+
+    '''
+    Klasifikuje všetky výseky z dávky {batch} naraz a odovzdá výsledky jednotlivým obrázkom
+    '''
+    async def processBatch(self, batch):
+        crops = np.concatenate([crops for _, crops, _ in batch])
+        self.batchSizes.append(len(crops))
+
+        try:
+            predictions = await asyncio.get_running_loop().run_in_executor(self.classifierExecutor, self.classify, crops)
+        except Exception as e:
+            for _, _, future in batch:
+                if(not future.done()):
+                    future.set_exception(e)
+            return
+
+        start = 0
+        for cameraId, frameCrops, future in batch:
+            if(not future.done()):
+                future.set_result((self.cameras[cameraId][0].ids, predictions[start:start + len(frameCrops)], len(crops)))
+            start += len(frameCrops)
+
+
+    '''
+    HOG deskriptory, PCA a klasifikácia výsekov {crops} (beží vo vlákne)
+    '''
+    def classify(self, crops):
+        descriptors = ParkingSpace.HOG_EXTRACTOR.compute(crops)
+        if(self.pca is not None):
+            descriptors = self.pca.transform(descriptors, self.numberOfComponents)
+
+        return self.classifier.makePrediction(descriptors)
+
+
+    '''
+    Posiela obrázky zo zdroja {source} (napr. FileFrameSource), naraz najviac {maxInFlight} obrázkov, výsledky odovzdá {onResult}
+    '''
+    async def runSource(self, source, onResult=None, maxInFlight=4):
+        semaphore = asyncio.Semaphore(maxInFlight)
+        tasks = []
+
+        async def submit(name, data):
+            try:
+                result = await self.submitFrame(source.cameraId, data)
+                result["frame"] = name
+                if(onResult is not None):
+                    onResult(result)
+            except Exception as e:
+                print(f"{source.cameraId}/{name} - {e}")
+            finally:
+                semaphore.release()
+
+        async for name, data in source.frames():
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(submit(name, data)))
+
+        await asyncio.gather(*tasks)
+
+
+    '''
+    Vráti štatistiku: počet obrázkov a dávok, hĺbku fronty, veľkosti dávok a latenciu obrázkov (p50/p95)
+    '''
+    def getStatistics(self):
+        latencies = np.asarray(self.latencies) * 1000
+        batchSizes = np.asarray(self.batchSizes)
+        return {
+            "frames": len(latencies),
+            "batches": len(batchSizes),
+            "queueDepth": self.queue.qsize() if self.queue is not None else 0,
+            "maxQueueDepth": self.maxQueueDepth,
+            "meanBatchSize": round(float(batchSizes.mean()), 1) if len(batchSizes) else 0,
+            "maxBatchSize": int(batchSizes.max()) if len(batchSizes) else 0,
+            "latencyMs": {
+                "p50": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+                "p95": round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None
+            }
+        }
+
+
+
+'''
+Spustí scheduler pre kamery {cameras} zo súborov (id kamery, XML s rozložením, priečinok s obrázkami) a vráti štatistiku
+    - {reduction} = zmenšenie pri dekódovaní obrázkov kamier (None = zmenšenie schedulera)
+'''
+async def runCameras(scheduler, cameras, interval=0.0, repeat=1, onResult=None, reduction=None):
+    for cameraId, layoutFileName, _ in cameras:
+        scheduler.addCamera(cameraId, Layout.fromXML(layoutFileName), reduction)
+
+    await scheduler.start()
+    try:
+        sources = [FileFrameSource(cameraId, path, interval, repeat) for cameraId, _, path in cameras]
+        await asyncio.gather(*[scheduler.runSource(source, onResult) for source in sources])
+    finally:
+        await scheduler.stop()
+
+    return scheduler.getStatistics()
+
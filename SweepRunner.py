@@ -0,0 +1,199 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from KNN import KNN
+from PCA import PCA
+from SVM import SVM
+
+
+'''
+Spustí jednu konfiguráciu sweepu (beží v samostatnom procese)
+    - Matice dát číta z {workDir} ako memory-mapped .npy súbory, takže ich procesy zdieľajú a nekopírujú
+    - Vráti (konfigurácia, úspešnosť, čas trénovania, čas predikcie, predikcie)
+'''
+def runConfiguration(workDir, configuration):
+    classifierName, parameter, pcaDimension = configuration
+
+    suffix = "" if pcaDimension is None else "PCA"
+    trainingData = np.load(f"{workDir}/training{suffix}.npy", mmap_mode="r")
+    testingData = np.load(f"{workDir}/testing{suffix}.npy", mmap_mode="r")
+    trainingLabels = np.load(f"{workDir}/trainingLabels.npy")
+    testingLabels = np.load(f"{workDir}/testingLabels.npy")
+
+    # PCA data are saved with all components, smaller dimension is only first columns
+    if(pcaDimension is not None):
+        trainingData = trainingData[:, :pcaDimension]
+        testingData = testingData[:, :pcaDimension]
+
+    classifier = SVM(parameter) if classifierName == "SVM" else KNN(parameter)
+
+    startTime = time.time()
+    classifier.fit(trainingData, trainingLabels)
+    trainTime = time.time() - startTime
+
+    startTime = time.time()
+    predictions = classifier.makePrediction(testingData)
+    predictTime = time.time() - startTime
+
+    accuracy = float(np.mean(testingLabels == predictions)) if len(testingLabels) else 0.0
+    return (configuration, accuracy, trainTime, predictTime, predictions)
+
+
+'''
+Trieda SweepRunner spúšťa mriežku konfigurácií (klasifikátor, parameter, dimenzia PCA) paralelne v procesoch
+    - Výsledky (úspešnosť, čas trénovania a predikcie) ukladá priebežne do CSV alebo JSON súboru
+    - Konfigurácie, ktoré už vo výsledkoch sú, preskočí (sweep sa dá prerušiť a znova spustiť)
+    - Pozor: pri spustení zo skriptu musí byť volanie v bloku if __name__ == "__main__" (kvôli procesom)
+'''
+class SweepRunner:
+
+    FIELDS = ["classifier", "parameter", "pcaDimension", "accuracy", "trainTime", "predictTime"]
+    PCA_SEED = 0
+
+    def __init__(self, resultsFileName, workDir=None, workers=None):
+        self.resultsFileName = resultsFileName
+        self.workers = workers
+
+        # Directory for shared memory-mapped matrices
+        if(workDir is None):
+            workDir = f"{os.path.splitext(resultsFileName)[0]}_data"
+        self.workDir = workDir
+
+
+    '''
+    Vráti mriežku konfigurácií ako v test_script.py (None = bez PCA)
+    '''
+    @staticmethod
+    def getGrid(kernels=["linear", "poly", "sigmoid", "rbf"], neighbors=[1, 3, 5, 7, 9, 11],
+                pcaDimensions=[None, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048]):
+        grid = []
+        for pcaDimension in pcaDimensions:
+            grid.extend([("SVM", kernel, pcaDimension) for kernel in kernels])
+            grid.extend([("KNN", kNeighbors, pcaDimension) for kNeighbors in neighbors])
+
+        return grid
+
+
+    '''
+    Vráti kľúč konfigurácie, podľa ktorého sa hľadá vo výsledkoch
+    '''
+    @staticmethod
+    def getKey(classifierName, parameter, pcaDimension):
+        return (str(classifierName), str(parameter), "" if pcaDimension is None else str(pcaDimension))
+
+
+    '''
+    Načíta už uložené výsledky (ak súbor neexistuje, vráti prázdny zoznam)
+    '''
+    def loadResults(self):
+        if(not os.path.exists(self.resultsFileName)):
+            return []
+
+        with open(self.resultsFileName, newline="") as file:
+            if(self.resultsFileName.endswith(".json")):
+                return json.load(file)
+            return list(csv.DictReader(file))
+
+
+    '''
+    Uloží všetky výsledky (najprv do dočasného súboru, aby pri prerušení nezostal poškodený)
+    '''
+    def saveResults(self, results):
+        temporaryFileName = f"{self.resultsFileName}.tmp"
+        with open(temporaryFileName, "w", newline="") as file:
+            if(self.resultsFileName.endswith(".json")):
+                json.dump(results, file, indent=2)
+            else:
+                writer = csv.DictWriter(file, fieldnames=self.FIELDS)
+                writer.writeheader()
+                writer.writerows(results)
+        os.replace(temporaryFileName, self.resultsFileName)
+
+
+    '''
+    Uloží matice dát do {workDir}, aby ich procesy mohli zdieľať cez memory-mapped súbory
+        - Matice, ktoré už v {workDir} sú (z prerušeného behu), sa znova nepočítajú ani neukladajú (pre nové dáta treba {workDir} zmazať)
+        - Ak sa v mriežke používa PCA, nafituje sa raz s dimenziou {pcaDimension} (najväčšia v mriežke) a pevným seed
+        - PCA dáta sa použijú znova, ak boli uložené s rovnakou dimenziou, solverom a seed (zapísané v PCA.json)
+    '''
+    def prepareData(self, trainingDataset, testingDataset, pcaDimension=None, pcaSolver="auto"):
+        os.makedirs(self.workDir, exist_ok=True)
+
+        fileNames = [f"{self.workDir}/{name}.npy" for name in ["training", "testing", "trainingLabels", "testingLabels"]]
+        if(not all(os.path.exists(fileName) for fileName in fileNames)):
+            trainingData, trainingLabels = trainingDataset.getTrainingData()
+            testingData, testingLabels = testingDataset.getTrainingData()
+            matrices = [np.asarray(trainingData, dtype=np.float32), np.asarray(testingData, dtype=np.float32), np.asarray(trainingLabels), np.asarray(testingLabels)]
+            for fileName, matrix in zip(fileNames, matrices):
+                self.saveMatrix(fileName, matrix)
+
+        if(pcaDimension is None):
+            return
+
+        configuration = {"pcaDimension": pcaDimension, "pcaSolver": pcaSolver, "seed": self.PCA_SEED}
+        configurationFileName = f"{self.workDir}/PCA.json"
+        if(os.path.exists(configurationFileName) and os.path.exists(f"{self.workDir}/trainingPCA.npy") and os.path.exists(f"{self.workDir}/testingPCA.npy")):
+            with open(configurationFileName) as file:
+                if(json.load(file) == configuration):
+                    return
+
+        # PCA is always fitted on saved float32 matrix, so rerun gives same components
+        trainingData = np.load(fileNames[0], mmap_mode="r")
+        testingData = np.load(fileNames[1], mmap_mode="r")
+        pca = PCA(pcaDimension, pcaSolver, self.PCA_SEED).fit(trainingData)
+        self.saveMatrix(f"{self.workDir}/trainingPCA.npy", pca.transform(trainingData))
+        self.saveMatrix(f"{self.workDir}/testingPCA.npy", pca.transform(testingData))
+        with open(configurationFileName, "w") as file:
+            json.dump(configuration, file)
+
+
+    '''
+    Uloží maticu {matrix} do .npy súboru {fileName} (najprv do dočasného súboru, aby pri prerušení nezostal poškodený)
+    '''
+    @staticmethod
+    def saveMatrix(fileName, matrix):
+        temporaryFileName = f"{fileName[:-len('.npy')]}.tmp.npy"
+        np.save(temporaryFileName, matrix)
+        os.replace(temporaryFileName, fileName)
+
+
+    '''
+    Spustí všetky konfigurácie z {grid}, ktoré ešte nie sú vo výsledkoch, a vráti všetky výsledky
+        - {onResult}(výsledok, predikcie) sa volá v hlavnom procese po dokončení každej konfigurácie (napr. pre uloženie najhoršieho obrázku)
+    '''
+    def run(self, trainingDataset, testingDataset, grid, onResult=None, pcaSolver="auto"):
+        results = self.loadResults()
+        done = {self.getKey(result["classifier"], result["parameter"], result["pcaDimension"]) for result in results}
+        remaining = [configuration for configuration in grid if self.getKey(*configuration) not in done]
+        if(not remaining):
+            return results
+
+        # PCA dimension is taken from whole grid (not only remaining configurations), so resumed sweep uses same PCA data
+        pcaDimensions = [pcaDimension for _, _, pcaDimension in grid if pcaDimension is not None]
+        self.prepareData(trainingDataset, testingDataset, max(pcaDimensions) if pcaDimensions else None, pcaSolver)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(runConfiguration, self.workDir, configuration) for configuration in remaining]
+            for future in as_completed(futures):
+                (classifierName, parameter, pcaDimension), accuracy, trainTime, predictTime, predictions = future.result()
+
+                result = {
+                    "classifier": classifierName,
+                    "parameter": parameter,
+                    "pcaDimension": "" if pcaDimension is None else pcaDimension,
+                    "accuracy": accuracy,
+                    "trainTime": trainTime,
+                    "predictTime": predictTime
+                }
+                results.append(result)
+                self.saveResults(results)
+
+                if(onResult is not None):
+                    onResult(result, predictions)
+
+        return results
@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+
+'''
+Príkazový riadok projektu (namiesto spúšťania celého experimentu cez test_script.py)
+    - Príkazy: load, extract, train, predict, sweep, serve (python cli.py <príkaz> --help)
+    - Moduly projektu (a cez ne OpenCV, sklearn, skimage, matplotlib) sa importujú až vo funkcii príkazu,
+      takže napr. predict načíta iba to, čo na klasifikáciu potrebuje
+'''
+
+
+'''
+Otvorí dataset z {path}: CropShard (ak je v priečinku manifest shardu) alebo priečinok s JPG a XML súbormi
+'''
+def openDataset(path, workers=1, lazy=False, reduction=1):
+    from CropShard import CropShard
+    from Dataset import Dataset
+
+    if(CropShard(path).exists()):
+        return Dataset.fromShard(path)
+
+    return Dataset(path, workers, featureCache=True, annotationIndex=True, lazy=lazy, reduction=reduction)
+
+
+'''
+Vráti hodnotu parametra klasifikátora z textu (počet susedov KNN je číslo, jadro SVM text)
+'''
+def parseParameter(value):
+    return int(value) if value.isdigit() else value
+
+
+'''
+load: načíta dataset (zaindexuje anotácie) a vypíše štatistiku, s --shard ho zbalí do CropShard
+'''
+def load(arguments):
+    from CropShard import CropShard
+
+    startTime = time.time()
+    if(arguments.shard):
+        dataset = openDataset(arguments.dataset, arguments.workers, lazy=True)
+        numberOfImages = CropShard(arguments.shard).append(dataset)
+        print(f"     - Do shardu {arguments.shard} pridanych obrazkov: {numberOfImages}")
+    else:
+        dataset = openDataset(arguments.dataset, arguments.workers)
+        dataset.getStatistics()
+
+    print("------ Dataset nacitany za {:.2f} sekund/y".format(time.time() - startTime))
+
+
+'''
+extract: vypočíta HOG deskriptory datasetu (uložia sa do FeatureCache), s --output ich uloží aj do .npy súboru
+'''
+def extract(arguments):
+    import numpy as np
+
+    startTime = time.time()
+    dataset = openDataset(arguments.dataset, arguments.workers)
+    trainingData, labels = dataset.getTrainingData()
+    if(arguments.output):
+        np.save(arguments.output, np.asarray(trainingData, dtype=np.float32))
+        np.save(f"{os.path.splitext(arguments.output)[0]}Labels.npy", np.asarray(labels))
+
+    print(f"     - Pocet deskriptorov: {len(labels)} x {np.shape(trainingData)[1] if len(labels) else 0}")
+    print("------ HOG deskriptory vyratane za {:.2f} sekund/y".format(time.time() - startTime))
+
+
+'''
+train: natrénuje SVM alebo KNN (voliteľne s PCA) a uloží model aj s PCA do súboru
+'''
+def train(arguments):
+    from KNN import KNN
+    from PCA import PCA
+    from SVM import SVM
+
+    trainingDataset = openDataset(arguments.dataset, arguments.workers, reduction=arguments.reduction)
+    pca = None
+    if(arguments.pca):
+        pca = PCA(arguments.pca)
+        trainingDataset.setPCA(pca)
+
+    if(arguments.classifier == "svm"):
+        classifier = SVM(arguments.kernel, arguments.mode)
+    else:
+        classifier = KNN(arguments.neighbors, arguments.backend)
+
+    startTime = time.time()
+    classifier.train(trainingDataset)
+    print("     - Trening za {:.2f} sekund/y".format(time.time() - startTime))
+
+    classifier.save(arguments.model, pca, reduction=trainingDataset.frameDecoder.reduction)
+    print(f"     - Model ulozeny do {arguments.model}")
+
+    if(arguments.test):
+        testingDataset = openDataset(arguments.test, arguments.workers, reduction=trainingDataset.frameDecoder.reduction)
+        testingDataset.setPCA(pca)
+        classifier.predictAndSetPredictions(testingDataset)
+
+
+'''
+predict: klasifikuje obrázky (s --layout, výsledok ako JSON pre každý obrázok) alebo celý dataset s anotáciami (--dataset, vyhodnotenie)
+'''
+def predict(arguments):
+    if(arguments.dataset):
+        from ModelArtifact import loadModel
+
+        dataset = openDataset(arguments.dataset, arguments.workers, reduction=arguments.reduction)
+        classifier, pca, numberOfComponents = loadModel(arguments.model, reduction=dataset.frameDecoder.reduction)
+        dataset.setPCA(pca, numberOfComponents)
+        dataset.setPredictions(classifier.makePrediction(dataset.getTrainingData()[0]))
+        print(json.dumps(dataset.getEvaluation().getReport(), indent=2))
+        return
+
+    if(not arguments.layout or not arguments.images):
+        raise Exception("cli.predict - Zadaj --dataset alebo --layout a obrázky")
+
+    from InferenceService import InferenceService
+
+    inferenceService = InferenceService.fromFiles(arguments.model, arguments.layout, reduction=arguments.reduction)
+    for fileName in arguments.images:
+        print(json.dumps(inferenceService.classifyFile(fileName)), flush=True)
+
+
+'''
+sweep: spustí mriežku konfigurácií (SweepRunner), s --worst uloží pre každú konfiguráciu najhorší obrázok
+'''
+def sweep(arguments):
+    from Image import Image
+    from SweepRunner import SweepRunner
+
+    trainingDataset = openDataset(arguments.training, arguments.workers)
+    testingDataset = openDataset(arguments.testing, arguments.workers)
+    pcaDimensions = [None] + arguments.pca
+    grid = SweepRunner.getGrid(arguments.kernels, arguments.neighbors, pcaDimensions)
+
+    def onResult(result, predictions):
+        print(f"{result['classifier']}_{result['parameter']}_{result['pcaDimension']}")
+        print("     - Uspesnost: ", result["accuracy"])
+        if(arguments.worst):
+            path = f"{arguments.worst}/{result['classifier']}_{result['parameter']}_{result['pcaDimension']}".rstrip("_")
+            os.makedirs(path, exist_ok=True)
+            testingDataset.setPredictions(predictions)
+            testingDataset.saveWorstImage("PREDICTION", path, "png", arguments.contact_sheet)
+
+    SweepRunner(arguments.results, workers=arguments.sweep_workers).run(trainingDataset, testingDataset, grid, onResult)
+    Image.waitForRenderer()
+
+
+'''
+serve: klasifikuje obrázky z kamier cez HTTP server alebo sledovaný priečinok (InferenceService), pri viacerých kamerách cez Scheduler
+'''
+def serve(arguments):
+    onResult = None if arguments.quiet else lambda result: print(json.dumps(result), flush=True)
+    if(arguments.camera):
+        import asyncio
+        from Scheduler import Scheduler, runCameras
+
+        if(arguments.reduction == "auto"):
+            raise Exception("cli.serve - Pri viacerých kamerách treba zadať zmenšenie (1, 2 alebo 4)")
+
+        scheduler = Scheduler.fromFile(arguments.model, arguments.reduction, maxBatchSize=arguments.max_batch,
+                                       maxWait=arguments.max_wait, workers=arguments.scheduler_workers)
+        cameras = [camera.split(":", 2) for camera in arguments.camera]
+        print(json.dumps(asyncio.run(runCameras(scheduler, cameras, arguments.interval, onResult=onResult))))
+        return
+
+    if(not arguments.layout):
+        raise Exception("cli.serve - Zadaj --layout alebo --camera")
+
+    from InferenceService import InferenceService
+
+    inferenceService = InferenceService.fromFiles(arguments.model, arguments.layout, arguments.change_threshold, arguments.max_age, arguments.reduction)
+    if(arguments.watch):
+        inferenceService.watchDirectory(arguments.watch, onResult=onResult or (lambda result: None))
+    else:
+        inferenceService.serve(arguments.host, arguments.port)
+
+
+'''
+Vráti parser argumentov príkazového riadku
+'''
+def getParser():
+    reduction = lambda value: value if value == "auto" else int(value)
+
+    parser = argparse.ArgumentParser(description="Klasifikácia obsadenosti parkovacích miest (HOG + SVM/KNN)")
+    parser.add_argument("--workers", type=int, default=1, help="počet procesov pri načítaní datasetu")
+    parser.add_argument("--debug", action="store_true", help="pri chybe vypísať celý traceback")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("load", help="načítať dataset a vypísať štatistiku (alebo ho zbaliť do shardu)")
+    command.add_argument("dataset", help="priečinok s JPG a XML súbormi")
+    command.add_argument("--shard", help="priečinok CropShard, do ktorého sa dataset pridá")
+    command.set_defaults(function=load)
+
+    command = commands.add_parser("extract", help="vypočítať HOG deskriptory datasetu")
+    command.add_argument("dataset", help="priečinok datasetu alebo CropShard")
+    command.add_argument("--output", help=".npy súbor, do ktorého sa deskriptory uložia")
+    command.set_defaults(function=extract)
+
+    command = commands.add_parser("train", help="natrénovať a uložiť model")
+    command.add_argument("dataset", help="trénovací dataset (priečinok alebo CropShard)")
+    command.add_argument("--model", required=True, help="súbor, do ktorého sa model uloží")
+    command.add_argument("--classifier", choices=["svm", "knn"], default="svm")
+    command.add_argument("--kernel", default="linear", help="jadro SVM")
+    command.add_argument("--mode", default="exact", help="mód SVM (exact, liblinear, sgd, nystroem, rff)")
+    command.add_argument("--neighbors", type=int, default=5, help="počet susedov KNN")
+    command.add_argument("--backend", default="auto", help="backend KNN (auto, brute, ball_tree, kd_tree, lsh, ivf)")
+    command.add_argument("--pca", type=int, help="počet komponentov PCA (predvolene bez PCA)")
+    command.add_argument("--test", help="dataset, na ktorom sa model po natrénovaní vyhodnotí")
+    command.add_argument("--reduction", type=reduction, default=1, help="dekódovanie obrázkov v zmenšenom rozlíšení (1, 2, 4, auto)")
+    command.set_defaults(function=train)
+
+    command = commands.add_parser("predict", help="klasifikovať obrázky alebo vyhodnotiť dataset")
+    command.add_argument("images", nargs="*", help="JPG obrázky (s --layout)")
+    command.add_argument("--model", required=True, help="súbor s modelom (SVM.save/KNN.save)")
+    command.add_argument("--layout", help="XML súbor s rozložením parkoviska")
+    command.add_argument("--dataset", help="dataset s anotáciami, vypíše sa vyhodnotenie (Evaluation)")
+    command.add_argument("--reduction", type=reduction, default=1, help="dekódovanie obrázku v zmenšenom rozlíšení (1, 2, 4, auto)")
+    command.set_defaults(function=predict)
+
+    command = commands.add_parser("sweep", help="spustiť mriežku konfigurácií klasifikátorov")
+    command.add_argument("training", help="trénovací dataset")
+    command.add_argument("testing", help="testovací dataset")
+    command.add_argument("--results", default="sweep.csv", help="CSV alebo JSON súbor s výsledkami")
+    command.add_argument("--kernels", nargs="*", default=["linear", "poly", "sigmoid", "rbf"])
+    command.add_argument("--neighbors", nargs="*", type=int, default=[1, 3, 5, 7, 9, 11])
+    command.add_argument("--pca", nargs="*", type=int, default=[], help="dimenzie PCA (konfigurácie bez PCA sa spustia vždy)")
+    command.add_argument("--sweep-workers", type=int, help="počet procesov sweepu (predvolene počet jadier)")
+    command.add_argument("--worst", help="priečinok, do ktorého sa uloží najhorší obrázok každej konfigurácie")
+    command.add_argument("--contact-sheet", action="store_true", help="chybné parkovacie miesta uložiť do jedného obrázku")
+    command.set_defaults(function=sweep)
+
+    command = commands.add_parser("serve", help="klasifikovať obrázky z kamier (HTTP server, priečinok alebo viac kamier)")
+    command.add_argument("--model", required=True, help="súbor s modelom (SVM.save/KNN.save)")
+    command.add_argument("--layout", help="XML súbor s rozložením parkoviska")
+    command.add_argument("--watch", help="priečinok, do ktorého prichádzajú obrázky")
+    command.add_argument("--host", default="127.0.0.1")
+    command.add_argument("--port", type=int, default=8080)
+    command.add_argument("--change-threshold", type=float, help="klasifikovať iba miesta, ktorých výsek sa zmenil viac ako o túto hodnotu")
+    command.add_argument("--max-age", type=int, help="po koľkých obrázkoch sa miesto klasifikuje znova aj bez zmeny")
+    command.add_argument("--reduction", type=reduction, default=1, help="dekódovanie obrázku v zmenšenom rozlíšení (1, 2, 4, auto)")
+    command.add_argument("--camera", action="append", help="kamera v tvare id:layout.xml:priecinok pre Scheduler (dá sa zadať viackrát)")
+    command.add_argument("--max-batch", type=int, default=1024, help="maximálny počet výsekov v dávke (Scheduler)")
+    command.add_argument("--max-wait", type=float, default=0.02, help="maximálne čakanie na doplnenie dávky v sekundách (Scheduler)")
+    command.add_argument("--workers", type=int, default=4, dest="scheduler_workers", help="počet vlákien pre dekódovanie a výseky (Scheduler)")
+    command.add_argument("--interval", type=float, default=0.0, help="pauza medzi obrázkami jednej kamery v sekundách (Scheduler)")
+    command.add_argument("--quiet", action="store_true", help="nevypisovať výsledky obrázkov (pri kamerách iba štatistiku)")
+    command.set_defaults(function=serve)
+
+    return parser
+
+
+def main(argv=None):
+    arguments = getParser().parse_args(argv)
+    try:
+        arguments.function(arguments)
+    except Exception as e:
+        # Errors raised by project (plain Exception with message) and file errors are shown only as message,
+        # other exceptions are programming errors and keep their traceback (with --debug every error has traceback)
+        if(arguments.debug or not (type(e) is Exception or isinstance(e, OSError))):
+            raise
+        print(e, file=sys.stderr)
+        return 1
+
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
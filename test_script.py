@@ -1,7 +1,9 @@
 from Dataset import Dataset
+from Image import Image
 from SVM import SVM
 from PCA import PCA
 from KNN import KNN
+from Profiler import Profiler
 import time
 import os
 
@@ -64,9 +66,9 @@ def trainAndPredictKNN(trainingDataset, testingDataset, info):
 
 # Nacitanie datasetu
 print("Nacitavam datasety")
-tDataset = Dataset("datasets/training")    # Trenovacia 
+tDataset = Dataset("datasets/training", featureCache=True, annotationIndex=True)    # Trenovacia 
 print("     - Trenovaci dataset nacitany")
-pDataset = Dataset("datasets/validating")        # Validacna/Testovacia
+pDataset = Dataset("datasets/validating", featureCache=True, annotationIndex=True)        # Validacna/Testovacia
 print("     - Validacny/Testovaci dataset nacitany")
 
 # Volame getTrainingData() aby sme pri trenovani/predikcii mali uz vyratane HOG deskriptory
@@ -90,10 +92,16 @@ trainAndPredictKNN(tDataset, pDataset, "")
 
 
 # S PCA
-for i in [1,2,4,8,16,32,64,128,256,512,1024,2048]:
+# PCA sa nafituje iba raz na trenovacom datasete s najvacsou dimenziou, mensie dimenzie pouzivaju iba prve komponenty
+PCA_DIMENSIONS = [1,2,4,8,16,32,64,128,256,512,1024,2048]
+print(f"\nFituje PCA({max(PCA_DIMENSIONS)})")
+pca = PCA(max(PCA_DIMENSIONS))
+pca.fit(tDataset.getTrainingData()[0])
+
+for i in PCA_DIMENSIONS:
     print(f"\nNastavuje PCA({i})")
-    tDataset.setPCA(PCA(i))
-    pDataset.setPCA(PCA(i))
+    tDataset.setPCA(pca, i)
+    pDataset.setPCA(pca, i)
 
     print("     - Zacinam vypocitavat PCA data")
     tDataset.getTrainingData()
@@ -105,3 +113,10 @@ for i in [1,2,4,8,16,32,64,128,256,512,1024,2048]:
     trainAndPredictKNN(tDataset, pDataset, f"PCA_{i}")
 
 
+# Pockame, kym sa na pozadi zapisu vsetky obrazky vysledkov
+Image.waitForRenderer()
+
+
+# Pri spusteni s PROFILER=1 sa vypise, kolko casu zabrali jednotlive kroky
+if(Profiler.enabled):
+    Profiler.printSummary()
@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import numpy as np
+
+from AnnotationIndex import AnnotationIndex
+from Dataset import Dataset
+
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "validating")
+
+
+'''
+Skopíruje XML súbory prvých {numberOfImages} obrázkov validačného datasetu do {path}, vráti ich mená
+'''
+def copyAnnotations(path, numberOfImages=3):
+    imageNames = Dataset.getFileNames(DATASET_PATH)[:numberOfImages]
+    for imageName in imageNames:
+        shutil.copy2(f"{DATASET_PATH}/{imageName}.xml", f"{path}/{imageName}.xml")
+
+    return imageNames
+
+
+'''
+Vráti anotácie parkovacích miest všetkých obrázkov z indexu ako slovník meno obrázku -> pole anotácií
+'''
+def getAnnotations(index, imageNames):
+    return {imageName: index.get(imageName)[0].copy() for imageName in imageNames if index.get(imageName) is not None}
+
+
+def test_updateReparsesModifiedAnnotation(tmp_path):
+    imageNames = copyAnnotations(tmp_path)
+    index = AnnotationIndex(str(tmp_path))
+    assert index.update() == len(imageNames)
+    before = getAnnotations(index, imageNames)
+
+    # Flip occupancy of first parking space of one image
+    modifiedImage = imageNames[1]
+    fileName = f"{tmp_path}/{modifiedImage}.xml"
+    with open(fileName) as file:
+        content = file.read()
+    occupied = 'occupied="1"' if before[modifiedImage]["occupied"][0] else 'occupied="0"'
+    flipped = 'occupied="0"' if before[modifiedImage]["occupied"][0] else 'occupied="1"'
+    with open(fileName, "w") as file:
+        file.write(content.replace(occupied, flipped, 1))
+    stat = os.stat(fileName)
+    os.utime(fileName, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    index = AnnotationIndex(str(tmp_path))
+    assert index.update() == 1
+    after = getAnnotations(index, imageNames)
+
+    assert np.count_nonzero(after[modifiedImage]["occupied"] != before[modifiedImage]["occupied"]) == 1
+    assert after[modifiedImage]["occupied"][0] != before[modifiedImage]["occupied"][0]
+    for imageName in imageNames:
+        if(imageName != modifiedImage):
+            assert np.array_equal(after[imageName], before[imageName])
+
+    # Nothing changed since last update
+    assert AnnotationIndex(str(tmp_path)).update() == 0
+
+
+def test_updateDropsRowsOfDeletedAnnotation(tmp_path):
+    imageNames = copyAnnotations(tmp_path)
+    index = AnnotationIndex(str(tmp_path))
+    index.update()
+    before = getAnnotations(index, imageNames)
+    numberOfSpaces = len(index.spaces)
+
+    deletedImage = imageNames[0]
+    os.remove(f"{tmp_path}/{deletedImage}.xml")
+
+    index = AnnotationIndex(str(tmp_path))
+    assert index.update() == 0
+    after = getAnnotations(index, imageNames)
+
+    assert len(index) == len(imageNames) - 1
+    assert deletedImage not in after
+    assert len(index.spaces) == numberOfSpaces - len(before[deletedImage])
+    for imageName in imageNames[1:]:
+        assert np.array_equal(after[imageName], before[imageName])
+
+    # Saved index is the same as updated one
+    loaded = AnnotationIndex(str(tmp_path)).load()
+    assert np.array_equal(loaded.spaces, index.spaces)
+    assert np.array_equal(loaded.frames, index.frames)
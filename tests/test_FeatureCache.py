@@ -0,0 +1,67 @@
+import os
+import shutil
+
+import numpy as np
+
+from Dataset import Dataset
+from HOGExtractor import HOGExtractor
+
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "validating")
+
+
+'''
+Skopíruje prvé {numberOfImages} obrázky validačného datasetu (JPG aj XML) do {path}, vráti ich mená
+'''
+def copyImages(path, numberOfImages=3):
+    imageNames = Dataset.getFileNames(DATASET_PATH)[:numberOfImages]
+    for imageName in imageNames:
+        for ext in ["jpg", "xml"]:
+            shutil.copy2(f"{DATASET_PATH}/{imageName}.{ext}", f"{path}/{imageName}.{ext}")
+
+    return imageNames
+
+
+def test_touchedImageIsRecomputedOthersAreMemoryMapped(tmp_path, monkeypatch):
+    imageNames = copyImages(tmp_path)
+
+    # Count descriptors computed by HOG (not loaded from cache)
+    computed = []
+    compute = HOGExtractor.compute
+
+    def countingCompute(self, crops, *args, **kwargs):
+        computed.append(len(crops))
+        return compute(self, crops, *args, **kwargs)
+
+    monkeypatch.setattr(HOGExtractor, "compute", countingCompute)
+
+    descriptors, _ = Dataset(str(tmp_path), featureCache=True).getTrainingData()
+    descriptors = np.array(descriptors)
+    assert sum(computed) == len(descriptors)
+
+    # Unchanged dataset: whole matrix is only memory-mapped from cache
+    computed.clear()
+    cached, _ = Dataset(str(tmp_path), featureCache=True).getTrainingData()
+    assert sum(computed) == 0
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, descriptors)
+
+    # Touched image: only its parking spaces are computed again
+    touchedImage = imageNames[1]
+    stat = os.stat(f"{tmp_path}/{touchedImage}.jpg")
+    os.utime(f"{tmp_path}/{touchedImage}.jpg", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    computed.clear()
+    dataset = Dataset(str(tmp_path), featureCache=True)
+    updated, _ = dataset.getTrainingData()
+    imageIndexes = dataset.getParkingSpaceTable().spaces["image"]
+    touched = np.asarray(dataset.getParkingSpaceTable().imageNames)[imageIndexes] == touchedImage
+    assert np.any(touched) and not np.all(touched)
+    assert sum(computed) == np.count_nonzero(touched)
+    assert np.allclose(updated, descriptors, atol=1e-6)
+
+    # Cache was rewritten, so next run memory-maps everything again
+    computed.clear()
+    cached, _ = Dataset(str(tmp_path), featureCache=True).getTrainingData()
+    assert sum(computed) == 0
+    assert isinstance(cached, np.memmap)
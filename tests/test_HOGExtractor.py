@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from Dataset import Dataset
+from HOGExtractor import HOGExtractor
+from Image import Image
+from ParkingSpace import ParkingSpace
+
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "validating")
+
+
+'''
+Vráti výseky parkovacích miest z prvých {numberOfImages} obrázkov validačného datasetu
+'''
+def getCrops(numberOfImages=2):
+    crops = []
+    for fileName in Dataset.getFileNames(DATASET_PATH)[:numberOfImages]:
+        crops.extend(parkingSpace.image for parkingSpace in Image(DATASET_PATH, fileName, keepImage=False).getParkingSpaces())
+
+    return np.asarray(crops)
+
+
+def test_numpyBackendMatchesSkimage():
+    crops = getCrops()
+    assert len(crops) > 0
+
+    maxDifference = ParkingSpace.HOG_EXTRACTOR.checkBackend(crops, "numpy", tolerance=1e-4)
+    assert maxDifference <= 1e-4
+
+
+def test_numpyBackendMatchesSkimageOnChunkBoundaries():
+    # Chunk smaller than number of crops, so crops are computed in several chunks
+    extractor = HOGExtractor(ParkingSpace.HOG_PARAMETERS, chunkSize=7)
+    crops = getCrops(1)
+
+    assert extractor.compute(crops).shape == (len(crops), extractor.getDescriptorLength(crops.shape[1:]))
+    assert extractor.checkBackend(crops, "numpy", tolerance=1e-4) <= 1e-4
@@ -0,0 +1,67 @@
+import csv
+import os
+
+import numpy as np
+
+from SweepRunner import SweepRunner
+
+
+'''
+Malý dataset s náhodnými dátami (SweepRunner z datasetu používa iba getTrainingData), počíta volania getTrainingData
+'''
+class RandomDataset:
+
+    def __init__(self, numberOfRows, seed):
+        random = np.random.default_rng(seed)
+        self.labels = random.integers(0, 2, numberOfRows)
+        self.data = random.normal(size=(numberOfRows, 16)) + self.labels[:, np.newaxis]
+        self.calls = 0
+
+    def getTrainingData(self):
+        self.calls += 1
+        return (self.data, self.labels)
+
+
+'''
+Vráti výsledky podľa kľúča konfigurácie (úspešnosť ako float, v CSV sú reťazce)
+'''
+def getAccuracies(results):
+    return {SweepRunner.getKey(result["classifier"], result["parameter"], result["pcaDimension"]): float(result["accuracy"]) for result in results}
+
+
+def test_resumedSweepRecomputesOnlyMissingConfigurations(tmp_path):
+    grid = SweepRunner.getGrid(kernels=["linear"], neighbors=[1, 3], pcaDimensions=[None, 2, 8])
+    trainingDataset, testingDataset = RandomDataset(120, 0), RandomDataset(40, 1)
+
+    # Full run for comparison
+    fullResults = SweepRunner(str(tmp_path / "full.csv"), workers=1).run(trainingDataset, testingDataset, grid)
+    assert len(fullResults) == len(grid)
+
+    runner = SweepRunner(str(tmp_path / "results.csv"), workers=1)
+    runner.run(trainingDataset, testingDataset, grid)
+
+    # Interrupted run: results of configurations with smaller PCA dimension are missing
+    with open(runner.resultsFileName, newline="") as file:
+        rows = list(csv.DictReader(file))
+    kept = [row for row in rows if row["pcaDimension"] != "2"]
+    with open(runner.resultsFileName, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=SweepRunner.FIELDS)
+        writer.writeheader()
+        writer.writerows(kept)
+
+    fileNames = [f"{runner.workDir}/{name}.npy" for name in ["training", "testing", "trainingPCA", "testingPCA"]]
+    modificationTimes = [os.stat(fileName).st_mtime_ns for fileName in fileNames]
+    calls = trainingDataset.calls
+
+    recomputed = []
+    results = runner.run(trainingDataset, testingDataset, grid, onResult=lambda result, predictions: recomputed.append(result))
+
+    missing = {SweepRunner.getKey(*configuration) for configuration in grid} - set(getAccuracies(kept))
+    assert {SweepRunner.getKey(result["classifier"], result["parameter"], result["pcaDimension"]) for result in recomputed} == missing
+    assert len(recomputed) == len(missing)
+
+    # Saved matrices (raw and PCA with maximal dimension of grid) are reused, features are not computed again
+    assert [os.stat(fileName).st_mtime_ns for fileName in fileNames] == modificationTimes
+    assert trainingDataset.calls == calls
+
+    assert getAccuracies(results) == getAccuracies(fullResults)